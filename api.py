@@ -1,21 +1,44 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from market_data_db import MarketDataDB
+from performance_snapshot import compute_performance, CHANGE_COLUMNS, LOOKBACK_DAYS
+from returns_engine import compute_returns, column_name, lookback_days, parse_horizons, DEFAULT_HORIZONS
+from price_history import build_histories, encode_columnar, normalize_range, range_start_date, slice_ranges, DEFAULT_MAX_POINTS, VALID_FORMATS
+from response_cache import PayloadCache
+from fast_json import FastJSONResponse, clean_records, dumps
+from singleflight import SingleFlight
+from warmup import CacheWarmer
 from sqlalchemy import text
 import pandas as pd
-import math
+import hashlib
+import threading
+import time
 import uvicorn
 import os
 from dotenv import load_dotenv
+from typing import Annotated, Optional
+from contextlib import asynccontextmanager
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the response cache in the background; /ready reports when it is done
+    if WARMUP_ENABLED:
+        cache_warmer.start()
+    else:
+        cache_warmer.disable()
+    yield
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Market Data API",
     description="API for serving real-time stock market data.",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # Enable CORS (Cross-Origin Resource Sharing)
@@ -34,6 +57,118 @@ app.add_middleware(
 # Initialize Database
 db = MarketDataDB()
 
+# Where returns missing from the snapshot are computed:
+#   "pandas" - pull recent prices and use the returns engine
+#   "sql"    - one LATERAL query in Postgres (one row per ticker over the wire; best for remote DBs)
+RETURNS_MODE = os.getenv("RETURNS_MODE", "pandas").lower()
+if RETURNS_MODE not in ("pandas", "sql"):
+    raise ValueError(f"RETURNS_MODE must be 'pandas' or 'sql', got '{RETURNS_MODE}'")
+
+# --- Response Cache ---
+# Fully assembled industry payloads, keyed by industry id + data version.
+payload_cache = PayloadCache(
+    max_entries=int(os.getenv("PAYLOAD_CACHE_MAX_ENTRIES", "64")),
+    max_bytes=int(os.getenv("PAYLOAD_CACHE_MAX_MB", "128")) * 1024 * 1024
+)
+# Per-symbol chart history (tooltips, prefetches) is kept apart, so hover traffic
+# never evicts the industry payloads above
+history_cache = PayloadCache(
+    max_entries=int(os.getenv("HISTORY_CACHE_MAX_ENTRIES", "512")),
+    max_bytes=int(os.getenv("HISTORY_CACHE_MAX_MB", "32")) * 1024 * 1024
+)
+# Concurrent misses for the same payload share one build (thundering herd after deploys/invalidation)
+single_flight = SingleFlight()
+# How often (seconds) the data version is re-read from Postgres
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "60"))
+
+_version_state = {"version": None, "checked_at": None}
+_industry_ids = {}
+_state_lock = threading.Lock()
+
+def get_data_version():
+    """Returns the current data version, re-checking Postgres at most every DATA_VERSION_TTL seconds."""
+    now = time.monotonic()
+    with _state_lock:
+        checked_at = _version_state["checked_at"]
+        if checked_at is not None and now - checked_at < DATA_VERSION_TTL:
+            return _version_state["version"]
+
+    version = db.get_data_version()
+    with _state_lock:
+        if version != _version_state["version"]:
+            _industry_ids.clear()
+        _version_state["version"] = version
+        _version_state["checked_at"] = now
+    return version
+
+def resolve_industry(industry_name: str):
+    """Resolves an industry name to (id, display_name). Cached until the data version changes."""
+    cached = _industry_ids.get(industry_name)
+    if cached:
+        return cached
+
+    with db.engine.connect() as conn:
+        # Try exact match first, then case-insensitive
+        ind_query = text("SELECT id, name FROM industries WHERE name = :name")
+        res = conn.execute(ind_query, {"name": industry_name}).fetchone()
+        
+        if not res:
+            # Case-insensitive fallback
+            ind_query_ci = text("SELECT id, name FROM industries WHERE LOWER(name) = LOWER(:name)")
+            res = conn.execute(ind_query_ci, {"name": industry_name}).fetchone()
+
+    if not res:
+        return None
+
+    _industry_ids[industry_name] = (res[0], res[1])
+    return _industry_ids[industry_name]
+
+def encode_json(payload) -> bytes:
+    return dumps(payload)
+
+# --- HTTP Caching ---
+# Payloads only change when the data version does (daily ingest), so browsers/CDNs
+# may reuse them briefly and revalidate cheaply with If-None-Match afterwards.
+CACHE_CONTROL = os.getenv("API_CACHE_CONTROL", "public, max-age=300, stale-while-revalidate=86400")
+
+def make_etag(*parts) -> str:
+    """Strong ETag derived from the data version and the response key."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match") if request is not None else None
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore any W/ prefix
+    candidates = [c.strip() for c in header.split(",")]
+    return any(c[2:] == etag if c.startswith("W/") else c == etag for c in candidates)
+
+def cached_json_response(request: Request, cache_key, version, build_payload,
+                         cache: PayloadCache = payload_cache) -> Response:
+    """
+    Serves a JSON payload with ETag/Cache-Control headers.
+    Returns 304 when the client already holds this version, otherwise the cached
+    body (or a freshly built one, which is then cached in `cache`). Concurrent misses
+    for the same key and version wait for a single build.
+    """
+    etag = make_etag(*cache_key, version)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    body = cache.get(cache_key, version)
+    if body is None:
+        def build():
+            built = encode_json(build_payload())
+            cache.put(cache_key, version, built)
+            return built
+        body = single_flight.do((cache_key, version), build)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/")
 def read_root():
     return {"status": "ok", "message": "Market Data API is running"}
@@ -43,149 +178,305 @@ def health_check():
     """Health check endpoint for Render/Kubernetes probes"""
     return {"status": "healthy"}
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness probe: 503 until the startup cache warmup has finished."""
+    progress = cache_warmer.progress()
+    return JSONResponse(status_code=200 if cache_warmer.ready else 503,
+                        content={"ready": cache_warmer.ready, "warmup": progress})
+
+@app.get("/api/stats")
+def get_stats():
+    """Response cache and request coalescing counters."""
+    return {"payload_cache": payload_cache.stats(), "history_cache": history_cache.stats(),
+            "single_flight": single_flight.stats()}
+
 @app.get("/api/industries")
-def get_industries():
-    try:
+def get_industries(request: Request = None):
+    def build_payload():
         with db.engine.connect() as conn:
             query = text("SELECT DISTINCT name FROM industries ORDER BY name")
             res = conn.execute(query).fetchall()
             return {"industries": [r[0] for r in res]}
+
+    try:
+        return cached_json_response(request, ("industries",), get_data_version(), build_payload)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/industry/{industry_name}")
-def get_industry_data(industry_name: str):
+def get_industry_data(industry_name: str, include_history: bool = True,
+                      format: str = "points", max_points: Annotated[Optional[int], Query(ge=3, le=5000)] = None,
+                      horizons: str = None, request: Request = None):
     from urllib.parse import unquote
     industry_name = unquote(industry_name)
+    fmt = parse_format(format)
+    horizon_keys = parse_horizon_param(horizons)
     try:
-        with db.engine.connect() as conn:
-            # 1. Get Industry ID (Try exact match first, then case-insensitive)
-            ind_query = text("SELECT id, name FROM industries WHERE name = :name")
-            res = conn.execute(ind_query, {"name": industry_name}).fetchone()
-            
-            if not res:
-                # Case-insensitive fallback
-                ind_query_ci = text("SELECT id, name FROM industries WHERE LOWER(name) = LOWER(:name)")
-                res = conn.execute(ind_query_ci, {"name": industry_name}).fetchone()
-                
-            if not res:
-                raise HTTPException(status_code=404, detail="Industry not found")
-            
-            ind_id = res[0]
-            industry_display_name = res[1]
-
-            # 2. Get Tickers
-            t_query = text("""
-                SELECT ticker, company_name, market_cap, pe_ratio, revenue
-                FROM tickers WHERE industry_id = :iid ORDER BY market_cap DESC NULLS LAST
-            """)
-            tickers_df = pd.read_sql(t_query, conn, params={"iid": ind_id})
-            if tickers_df.empty:
-                return {"industry": industry_display_name, "stocks": [], "ticker_count": 0, "donut_data": {"series":[], "labels":[]}, "total_market_cap": 0}
-
-            tickers_list = tickers_df['ticker'].tolist()
-            
-            # 3. Fetch Prices
-            p_query = text("""
-                SELECT symbol as ticker, date as market_date, close as close_price, volume
-                FROM us_daily_prices WHERE symbol IN :tickers 
-                AND date >= CURRENT_DATE - INTERVAL '730 days'
+        version = get_data_version()
+
+        # 1. Get Industry ID
+        res = resolve_industry(industry_name)
+        if not res:
+            raise HTTPException(status_code=404, detail="Industry not found")
+
+        ind_id, industry_display_name = res
+
+        return cached_json_response(
+            request, ("industry", ind_id, include_history, fmt, max_points, ",".join(horizon_keys)), version,
+            lambda: build_industry_payload(ind_id, industry_display_name, include_history, fmt, max_points, horizon_keys)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+def build_industry_payload(ind_id: int, industry_display_name: str, include_history: bool = True,
+                           fmt: str = "points", max_points: int = None,
+                           horizon_keys=DEFAULT_HORIZONS) -> dict:
+    """
+    Assembles the full /api/industry response for one industry.
+    With include_history=False the per-stock history arrays are omitted
+    (clients load them lazily from /api/history). With fmt="columnar" all
+    histories are sent once in a top-level "history" object instead.
+    max_points LTTB-downsamples every history series in one batched call.
+    Non-default horizon_keys are computed live with the returns engine.
+    """
+    with db.engine.connect() as conn:
+        # 2. Get Tickers (joined with the precomputed performance snapshot)
+        t_query = text("""
+            SELECT t.ticker, t.company_name, t.market_cap, t.pe_ratio, t.revenue,
+                   p.as_of_date, p.price, p.volume,
+                   p.change_1d, p.change_1m, p.change_2m, p.change_3m,
+                   p.change_6m, p.change_12m, p.change_ytd
+            FROM tickers t
+            LEFT JOIN ticker_performance p ON p.symbol = t.ticker
+            WHERE t.industry_id = :iid ORDER BY t.market_cap DESC NULLS LAST
+        """)
+        tickers_df = pd.read_sql(t_query, conn, params={"iid": ind_id})
+        if tickers_df.empty:
+            return {"industry": industry_display_name, "stocks": [], "ticker_count": 0, "donut_data": {"series":[], "labels":[]}, "total_market_cap": 0}
+
+        tickers_list = tickers_df['ticker'].tolist()
+        
+        # 3. Fetch Prices (History, plus live fallback for tickers missing from the snapshot)
+        missing = tickers_df['as_of_date'].isna()
+        custom_horizons = tuple(horizon_keys) != tuple(DEFAULT_HORIZONS)
+        change_cols = [column_name(h) for h in horizon_keys]
+
+        def industry_prices(days: int, missing_only: bool = False):
+            # Joined through industry_id so the ticker list never travels back to the database
+            p_query = text(f"""
+                SELECT p.symbol as ticker, p.date as market_date, p.close as close_price, p.volume
+                FROM us_daily_prices p JOIN tickers t ON t.ticker = p.symbol
+                WHERE t.industry_id = :iid AND p.date >= CURRENT_DATE - INTERVAL '{days} days'
+                {"AND NOT EXISTS (SELECT 1 FROM ticker_performance tp WHERE tp.symbol = p.symbol)" if missing_only else ""}
                 ORDER BY market_date ASC
             """)
-            prices_df = pd.read_sql(p_query, conn, params={"tickers": tuple(tickers_list)})
+            return pd.read_sql(p_query, conn, params={"iid": ind_id})
+
+        if include_history:
+            prices_df = industry_prices(730)
             if prices_df.empty:
                  return {"industry": industry_display_name, "stocks": [], "ticker_count": len(tickers_list), "donut_data": {"series":[], "labels":[]}, "total_market_cap": 0}
+        elif missing.any() and RETURNS_MODE == "pandas":
+            prices_df = industry_prices(LOOKBACK_DAYS, missing_only=True)
+        else:
+            prices_df = pd.DataFrame(columns=['ticker', 'market_date', 'close_price', 'volume'])
+
+        prices_df['market_date'] = pd.to_datetime(prices_df['market_date'])
+
+        # Fallback: tickers not yet in the snapshot are computed live
+        if missing.any():
+            if RETURNS_MODE == "sql":
+                live = db.get_industry_returns(ind_id, DEFAULT_HORIZONS, missing_snapshot_only=True)
+            else:
+                live = compute_performance(prices_df[prices_df['ticker'].isin(tickers_df.loc[missing, 'ticker'])])
+            live = live.set_index('ticker')
+            for col in ['as_of_date', 'price', 'volume'] + CHANGE_COLUMNS:
+                tickers_df[col] = tickers_df[col].fillna(tickers_df['ticker'].map(live[col]))
+
+        # Custom horizons (e.g. ?horizons=2W,1M,3Y) are not in the snapshot
+        if custom_horizons:
+            if RETURNS_MODE == "sql":
+                custom = db.get_industry_returns(ind_id, horizon_keys)
+            else:
+                custom = compute_returns(industry_prices(lookback_days(horizon_keys)), horizon_keys)
+            custom = custom.set_index('ticker')
+            for col in change_cols:
+                tickers_df[col] = tickers_df['ticker'].map(custom[col])
+
+        # --- Result Assembly ---
+        # NaN/Inf handling and type conversion happen column-wise, not per cell
+        stocks_df = pd.DataFrame({
+            "symbol": tickers_df['ticker'],
+            "company": tickers_df['company_name'].where(tickers_df['company_name'].fillna('') != '', tickers_df['ticker']),
+            "price": tickers_df['price'],
+            "market_cap": tickers_df['market_cap'],
+            "pe_ratio": tickers_df['pe_ratio'],
+            "volume": tickers_df['volume'],
+            "revenue": tickers_df['revenue'],
+            **{col: tickers_df[col] for col in change_cols}
+        })
+        result_data = clean_records(stocks_df, float_cols=['price', 'pe_ratio'] + change_cols,
+                                    int_cols=['market_cap', 'volume', 'revenue'], str_cols=['symbol', 'company'])
+
+        if include_history:
+            recent = prices_df.groupby('ticker').tail(1000).rename(columns={'ticker': 'symbol'})
+            if fmt == "points":
+                histories = build_histories(recent, 'MAX', max_points, symbols=tickers_list)
+                for stock in result_data:
+                    stock["history"] = histories[stock["symbol"]]
+
+        market_caps = pd.to_numeric(tickers_df['market_cap'], errors='coerce').fillna(0).to_numpy(dtype='float64')
+        others_mcap = float(market_caps[5:].sum())
+        donut_series = market_caps[:5].tolist()
+        donut_labels = tickers_df['ticker'].head(5).tolist()
+        if others_mcap > 0:
+            donut_series.append(others_mcap)
+            donut_labels.append("Others")
+
+        payload = {
+            "industry": industry_display_name,
+            "total_market_cap": float(market_caps.sum()),
+            "ticker_count": len(tickers_list),
+            "donut_data": {"series": donut_series, "labels": donut_labels},
+            "stocks": result_data
+        }
+        if include_history and fmt == "columnar":
+            payload["history"] = encode_columnar(recent, symbols=tickers_list, max_points=max_points)
+        return payload
+
+# --- Startup Warmup ---
+# WARMUP_TOP_N=0 warms as many industries as the payload cache holds; otherwise the
+# N largest by total market cap (still capped by the cache size)
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_TOP_N = int(os.getenv("WARMUP_TOP_N", "0"))
+WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "4"))
+
+def list_warmup_industries() -> list:
+    """
+    Industry names ordered by total market cap (largest first), limited to what fits
+    in the payload cache so the LRU never evicts the hottest payloads it just warmed.
+    """
+    # One entry is kept for the /api/industries list
+    capacity = max(payload_cache.max_entries - 1, 0)
+    limit = min(WARMUP_TOP_N, capacity) if WARMUP_TOP_N > 0 else capacity
+    query = text("""
+        SELECT i.name FROM industries i
+        LEFT JOIN tickers t ON t.industry_id = i.id
+        GROUP BY i.id, i.name
+        ORDER BY COALESCE(SUM(t.market_cap), 0) DESC, i.name
+        LIMIT :n
+    """)
+    with db.engine.connect() as conn:
+        return [r[0] for r in conn.execute(query, {"n": limit}).fetchall()]
+
+def warm_industry(name: str) -> bool:
+    # Stop once the byte budget is reached; further puts would evict larger industries
+    if not payload_cache.has_room():
+        return False
+    # Same variant the dashboard requests (history is loaded lazily per ticker)
+    get_industry_data(name, include_history=False)
+    return True
+
+def warm_all():
+    get_industries()
+    return list_warmup_industries()
+
+cache_warmer = CacheWarmer(warm_all, warm_industry, concurrency=WARMUP_CONCURRENCY)
+
+# --- Price History ---
+MAX_HISTORY_SYMBOLS = 200
+
+def load_history(symbols: list, range_key: str, max_points: int, fmt: str = "points"):
+    """
+    Reads, slices and downsamples price history for each symbol.
+    Returns {symbol: points}, or one columnar object when fmt="columnar".
+    """
+    start_date = range_start_date(range_key)
+    if len(symbols) == 1:
+        df = db.get_data(symbols[0], start_date=start_date)
+        if not df.empty:
+            df = df.reset_index()
+            df['symbol'] = symbols[0]
+    else:
+        df = db.get_data_many(symbols, start_date=start_date)
 
-            prices_df['market_date'] = pd.to_datetime(prices_df['market_date'])
-            
-            # --- Vectorized Performance Calculations ---
-            # Pre-calculate latest prices and volume for all tickers
-            ticker_groups = prices_df.groupby('ticker')
-            latest_prices = prices_df.sort_values('market_date').drop_duplicates('ticker', keep='last')
-            ticker_to_latest = latest_prices.set_index('ticker')
-
-            def get_bulk_pct_changes(months=0, days=0):
-                offsets = pd.DateOffset(months=months) if months > 0 else pd.DateOffset(days=days)
-                t_dates = latest_prices[['ticker', 'market_date']].copy()
-                t_dates['target'] = t_dates['market_date'] - offsets
-                
-                sp = pd.merge_asof(
-                    t_dates.sort_values('target'),
-                    prices_df.sort_values('market_date'),
-                    left_on='target', right_on='market_date', by='ticker', direction='backward'
-                )
-                m = pd.merge(latest_prices[['ticker', 'close_price']], sp[['ticker', 'close_price']], on='ticker', suffixes=('_now', '_start'))
-                m['change'] = ((m['close_price_now'] - m['close_price_start']) / m['close_price_start']) * 100
-                return m.set_index('ticker')['change'].to_dict()
-
-            c_1d = get_bulk_pct_changes(days=1)
-            c_1m = get_bulk_pct_changes(months=1)
-            c_2m = get_bulk_pct_changes(months=2)
-            c_3m = get_bulk_pct_changes(months=3)
-            c_6m = get_bulk_pct_changes(months=6)
-            c_12m = get_bulk_pct_changes(months=12)
-
-            cur_yr = pd.Timestamp.now().year
-            y_starts = prices_df[prices_df['market_date'].dt.year == cur_yr].sort_values('market_date').drop_duplicates('ticker', keep='first')
-            m_ytd = pd.merge(latest_prices[['ticker', 'close_price']], y_starts[['ticker', 'close_price']], on='ticker', suffixes=('_now', '_start'))
-            m_ytd['change'] = ((m_ytd['close_price_now'] - m_ytd['close_price_start']) / m_ytd['close_price_start']) * 100
-            c_ytd = m_ytd.set_index('ticker')['change'].to_dict()
-
-            # --- Result Assembly ---
-            def sf(v):
-                if pd.isna(v) or v is None: return None
-                return float(v) if math.isfinite(v) else None
-
-            def si(v):
-                if pd.isna(v) or v is None: return 0
-                try:
-                    return int(float(v))
-                except: return 0
-
-            result_data = []
-            for _, row in tickers_df.iterrows():
-                t = row['ticker']
-                hist = []
-                if t in ticker_groups.groups:
-                    group = ticker_groups.get_group(t).tail(1000)
-                    hist = [{"x": r['market_date'].strftime('%Y-%m-%d'), "y": sf(r['close_price'])} for _, r in group.iterrows()]
-
-                result_data.append({
-                    "symbol": t,
-                    "company": row['company_name'] or t,
-                    "price": sf(ticker_to_latest.at[t, 'close_price'] if t in ticker_to_latest.index else None),
-                    "market_cap": si(row['market_cap']),
-                    "pe_ratio": sf(row['pe_ratio']),
-                    "volume": si(ticker_to_latest.at[t, 'volume'] if t in ticker_to_latest.index else 0),
-                    "revenue": si(row['revenue']),
-                    "change_1d": sf(c_1d.get(t)),
-                    "change_1m": sf(c_1m.get(t)),
-                    "change_2m": sf(c_2m.get(t)),
-                    "change_3m": sf(c_3m.get(t)),
-                    "change_6m": sf(c_6m.get(t)),
-                    "change_12m": sf(c_12m.get(t)),
-                    "change_ytd": sf(c_ytd.get(t)),
-                    "history": hist
-                })
-
-            top_5 = tickers_df.head(5)
-            others_mcap = tickers_df.iloc[5:]['market_cap'].sum() if len(tickers_df) > 5 else 0
-            donut_series = [sf(x) or 0.0 for x in top_5['market_cap'].tolist()]
-            donut_labels = top_5['ticker'].tolist()
-            if others_mcap > 0:
-                donut_series.append(sf(others_mcap))
-                donut_labels.append("Others")
-
-            return {
-                "industry": industry_display_name,
-                "total_market_cap": sf(tickers_df['market_cap'].sum()),
-                "ticker_count": len(tickers_list),
-                "donut_data": {"series": donut_series, "labels": donut_labels},
-                "stocks": result_data
-            }
+    if not df.empty:
+        df = df.rename(columns={'date': 'market_date', 'close': 'close_price'})
+        df['market_date'] = pd.to_datetime(df['market_date'])
+
+    if fmt == "columnar":
+        return encode_columnar(slice_ranges(df, range_key), symbols=symbols, max_points=max_points)
+
+    return build_histories(df, range_key, max_points, symbols=symbols)
+
+def parse_history_params(range_key: str):
+    try:
+        return normalize_range(range_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def parse_horizon_param(horizons: str) -> list:
+    if not horizons:
+        return list(DEFAULT_HORIZONS)
+    try:
+        return parse_horizons(horizons)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def parse_format(fmt: str) -> str:
+    fmt = (fmt or "points").lower()
+    if fmt not in VALID_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}'. Expected one of {list(VALID_FORMATS)}")
+    return fmt
+
+@app.get("/api/history/{symbol}")
+def get_symbol_history(symbol: str,
+                       range_key: Annotated[str, Query(alias="range")] = "12M",
+                       max_points: Annotated[int, Query(ge=3, le=5000)] = DEFAULT_MAX_POINTS,
+                       format: str = "points",
+                       request: Request = None):
+    symbol = symbol.strip().upper()
+    range_key = parse_history_params(range_key)
+    fmt = parse_format(format)
+
+    def build_payload():
+        history = load_history([symbol], range_key, max_points, fmt)
+        return {"symbol": symbol, "range": range_key, "history": history if fmt == "columnar" else history[symbol]}
+
+    try:
+        return cached_json_response(
+            request, ("history", symbol, range_key, max_points, fmt), get_data_version(), build_payload,
+            cache=history_cache
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/history")
+def get_history(symbols: str,
+                range_key: Annotated[str, Query(alias="range")] = "12M",
+                max_points: Annotated[int, Query(ge=3, le=5000)] = DEFAULT_MAX_POINTS,
+                format: str = "points",
+                request: Request = None):
+    """Batch variant: ?symbols=AAL,DAL,UAL"""
+    symbol_list = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="No symbols provided")
+    if len(symbol_list) > MAX_HISTORY_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_HISTORY_SYMBOLS} symbols per request")
+    range_key = parse_history_params(range_key)
+    fmt = parse_format(format)
+    try:
+        return cached_json_response(
+            request, ("history", ",".join(symbol_list), range_key, max_points, fmt), get_data_version(),
+            lambda: {"range": range_key, "history": load_history(symbol_list, range_key, max_points, fmt)},
+            cache=history_cache
+        )
     except Exception as e:
-        import traceback
-        traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
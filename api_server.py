@@ -1,6 +1,8 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from market_data_db import MarketDataDB
+from returns_engine import compute_returns, DEFAULT_HORIZONS
+from performance_snapshot import CHANGE_COLUMNS
 from sqlalchemy import text
 import pandas as pd
 import math
@@ -95,28 +97,8 @@ def get_industry_data(industry_name: str):
                     return f_val if not (math.isnan(f_val) or math.isinf(f_val)) else None
                 except: return None
 
-            def get_pct_change(sub_df, months=0, days=0):
-                if sub_df.empty: return None
-                latest = sub_df.iloc[-1]
-                latest_date = latest['market_date']
-                
-                if months > 0:
-                    start_date = latest_date - pd.DateOffset(months=months)
-                elif days > 0:
-                    start_date = latest_date - pd.DateOffset(days=days)
-                else:
-                    return None
-                
-                match = sub_df[sub_df['market_date'] <= start_date]
-                if match.empty:
-                    start_row = sub_df.iloc[0]
-                else:
-                    start_row = match.iloc[-1]
-                
-                sp = start_row['close_price']
-                cp = latest['close_price']
-                if sp == 0: return 0.0
-                return ((cp - sp) / sp) * 100
+            # All horizons for all tickers in one pass (shared with api.py / reports)
+            returns = compute_returns(prices_df.drop_duplicates(['ticker', 'market_date']), DEFAULT_HORIZONS).set_index('ticker')
 
             result_data = []
             total_mcap = safe_float(tickers_df['market_cap'].sum()) or 0.0
@@ -136,21 +118,8 @@ def get_industry_data(industry_name: str):
                 }
 
                 if not t_prices.empty:
-                    info.update({
-                        "change_1d": safe_float(get_pct_change(t_prices, days=1)),
-                        "change_1m": safe_float(get_pct_change(t_prices, months=1)),
-                        "change_2m": safe_float(get_pct_change(t_prices, months=2)),
-                        "change_3m": safe_float(get_pct_change(t_prices, months=3)),
-                        "change_6m": safe_float(get_pct_change(t_prices, months=6)),
-                        "change_12m": safe_float(get_pct_change(t_prices, months=12)),
-                        "history": [{"x": r['market_date'].strftime('%Y-%m-%d'), "y": safe_float(r['close_price'])} for _, r in t_prices.tail(1000).iterrows()]
-                    })
-                    cur_yr = pd.Timestamp.now().year
-                    ytd = t_prices[t_prices['market_date'].dt.year == cur_yr]
-                    if len(ytd) > 1:
-                        v = ((ytd.iloc[-1]['close_price'] - ytd.iloc[0]['close_price']) / ytd.iloc[0]['close_price']) * 100
-                        info['change_ytd'] = safe_float(v)
-                    else: info['change_ytd'] = None
+                    info.update({col: safe_float(returns.at[t, col]) if t in returns.index else None for col in CHANGE_COLUMNS})
+                    info["history"] = [{"x": r['market_date'].strftime('%Y-%m-%d'), "y": safe_float(r['close_price'])} for _, r in t_prices.tail(1000).iterrows()]
                 else:
                     info.update({"change_1d":None, "change_1m":None, "change_2m":None, "change_3m":None, "change_6m":None, "change_12m":None, "change_ytd":None, "history":[]})
 
@@ -0,0 +1,198 @@
+"""
+Historical price backfill.
+
+Splits the requested range into calendar-year chunks and downloads every
+(year, batch of tickers) as one multi-ticker download on the shared fetch
+scheduler (metered per symbol). Rows go through the ingest pipeline into the COPY-based bulk upsert.
+Each (ticker, year) is a ledger item, so an interrupted backfill resumes with
+only the chunks that are missing:
+
+    python backfill.py --start 2010-01-01
+    python backfill.py --start 2000-01-01 --industry Airlines --workers 8
+    python backfill.py --start 2015-01-01 --tickers AAPL,MSFT --shard 1/2
+
+Backfilled prices reference `tickers`, so on an empty database either run
+batch_run.py first (registers the Excel universe with fundamentals) or pass
+--tickers: unknown ones are registered without fundamentals.
+
+Watermarks only move forward (GREATEST), so backfilling old years never makes
+daily_update re-fetch recent data.
+"""
+import argparse
+import zlib
+import pandas as pd
+from datetime import datetime
+from sqlalchemy import text
+from market_data_db import MarketDataDB
+from market_data_fetcher import MarketDataFetcher, NO_DATA
+from fetch_scheduler import FetchScheduler
+from ingest_pipeline import IngestPipeline
+from ingest_ledger import IngestLedger
+from sharding import parse_shard, select_shard, shard_job_key
+
+# Symbols per yfinance multi-ticker download (one year of ~252 rows each)
+BACKFILL_BATCH_SIZE = 100
+
+
+def year_chunks(start_date: str, end_date: str) -> list:
+    """
+    Splits [start_date, end_date) into calendar-year ranges, newest first.
+
+    Returns:
+        list: (year, chunk_start 'YYYY-MM-DD', chunk_end 'YYYY-MM-DD' exclusive)
+    """
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    chunks = []
+    for year in range(start.year, end.year + 1):
+        chunk_start = max(start, pd.Timestamp(year=year, month=1, day=1))
+        chunk_end = min(end, pd.Timestamp(year=year + 1, month=1, day=1))
+        if chunk_start < chunk_end:
+            chunks.append((year, chunk_start.strftime('%Y-%m-%d'), chunk_end.strftime('%Y-%m-%d')))
+    return chunks[::-1]
+
+
+def job_scope(tickers: list = None, industry: str = None) -> str:
+    """Part of the ledger key naming what is backfilled: 'all', the industry, or a ticker-list hash."""
+    if tickers:
+        return f"tickers {zlib.crc32(','.join(sorted(tickers)).encode('utf-8')):08x}"
+    return industry or "all"
+
+
+def item_key(symbol: str, year: int) -> str:
+    """Ledger item for one ticker-year, e.g. 'AAPL@2015'."""
+    return f"{symbol}@{year}"
+
+
+class Backfiller:
+    def __init__(self, workers: int = None, shard: tuple = None):
+        print("Initializing Backfill..." + (f" (shard {shard[0]}/{shard[1]})" if shard else ""))
+        self.shard = shard
+        self.db = MarketDataDB()
+        self.fetcher = MarketDataFetcher()
+        self.scheduler = FetchScheduler(workers=workers)
+        self.ledger = IngestLedger(self.db)
+
+    def get_tickers(self, industry: str = None) -> list:
+        """Registered tickers, optionally limited to one industry."""
+        with self.db.engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT t.ticker FROM tickers t LEFT JOIN industries i ON i.id = t.industry_id
+                WHERE CAST(:industry AS text) IS NULL OR i.name = :industry
+                ORDER BY t.ticker
+            """), {"industry": industry}).fetchall()
+        return [r[0] for r in rows]
+
+    def register_unknown(self, tickers: list, industry: str = None) -> list:
+        """
+        Registers explicitly requested tickers that are not in `tickers` yet (prices reference
+        them), under `industry` if given. Fundamentals are left to batch_run.py.
+
+        Returns:
+            list: The newly registered tickers.
+        """
+        known = set(self.get_tickers())
+        unknown = [t for t in tickers if t not in known]
+        if unknown:
+            industry_id = self.db.get_or_create_industry(industry) if industry else None
+            print(f"Registering {len(unknown)} unknown tickers"
+                  + (f" under '{industry}'" if industry else " without an industry") + "...")
+            self.db.register_tickers([{'ticker': t, 'industry_id': industry_id} for t in unknown])
+        return unknown
+
+    def run(self, start_date: str, end_date: str = None, tickers: list = None, industry: str = None):
+        """
+        Backfills prices for every ticker and year chunk in [start_date, end_date).
+
+        Args:
+            start_date (str): First date to load (YYYY-MM-DD); any historical date.
+            end_date (str): Exclusive end date (YYYY-MM-DD). Defaults to today; the job is then
+                            keyed as open-ended, so rerunning on a later day resumes it.
+            tickers (list): Explicit tickers, registered first if unknown; defaults to all
+                            registered (or one industry's).
+            industry (str): Limit to the tickers of this industry.
+        """
+        # The key keeps what the caller asked for; only fetching needs the concrete date
+        job_key = shard_job_key(f"{start_date}|{end_date or 'open'}|{job_scope(tickers, industry)}", self.shard)
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        if tickers:
+            tickers = select_shard(tickers, self.shard)
+            self.register_unknown(tickers, industry)
+        else:
+            tickers = select_shard(self.get_tickers(industry), self.shard)
+        chunks = year_chunks(start_date, end_date)
+        print(f"--- Backfill {start_date} -> {end_date}: {len(tickers)} tickers x {len(chunks)} yearly chunks ---")
+        if not tickers or not chunks:
+            print("Nothing to backfill.")
+            return
+
+        # One ledger item per (ticker, year); a rerun with the same range resumes
+        all_items = [item_key(t, year) for year, _, _ in chunks for t in tickers]
+        job_id, todo = self.ledger.open_job('backfill', job_key, all_items)
+        todo = set(todo)
+
+        jobs = []
+        for year, chunk_start, chunk_end in chunks:
+            pending = [t for t in tickers if item_key(t, year) in todo]
+            for i in range(0, len(pending), BACKFILL_BATCH_SIZE):
+                jobs.append((year, chunk_start, chunk_end, pending[i:i + BACKFILL_BATCH_SIZE]))
+        print(f"Fetching {len(jobs)} batches ({self.scheduler.workers} workers, "
+              f"{self.scheduler.rate:.1f} symbol requests/s)...")
+
+        def checkpoint(batch):
+            years = pd.to_datetime(batch['market_date']).dt.year
+            self.ledger.mark_done(job_id, sorted({item_key(s, y) for s, y in zip(batch['symbol'], years)}))
+
+        pipeline = IngestPipeline(lambda df: self.db.save_daily_data(df, bulk=True), on_written=checkpoint)
+
+        def fetch_chunk(job):
+            year, chunk_start, chunk_end, batch = job
+            self.ledger.mark_started(job_id, [item_key(t, year) for t in batch])
+            df, failures = self.fetcher.fetch_many(batch, chunk_start, chunk_end, batch_size=len(batch), pause=0)
+            if not df.empty:
+                self.ledger.mark_fetched(job_id, {item_key(s, year): n for s, n in df['symbol'].value_counts().items()})
+            pipeline.put(df)
+            return df, failures
+
+        # yfinance sends one request per symbol, so a batch costs len(batch) tokens
+        results = self.scheduler.run(fetch_chunk, jobs, cost=lambda job: len(job[3]))
+        with pipeline:
+            for (year, _, _, batch), result, error in results:
+                if error is not None:
+                    print(f"Failed {year} batch: {error}")
+                    self.ledger.mark_failed(job_id, {item_key(t, year): error for t in batch})
+                    continue
+                failures = result[1]
+                # A year Yahoo confirms as empty (not yet listed, delisted) is final; throttled
+                # or timed-out ticker-years stay 'failed' and are retried by a rerun
+                self.ledger.mark_failed(job_id, {item_key(t, year): e for t, e in failures.items()
+                                                 if e == NO_DATA}, status='skipped')
+                self.ledger.mark_failed(job_id, {item_key(t, year): e for t, e in failures.items()
+                                                 if e != NO_DATA})
+
+        print(self.scheduler.summary())
+        print(f"[Pipeline] Wrote {sum(pipeline.counts.values())} rows in {pipeline.batches} transactions "
+              f"({pipeline.counts['inserted']} inserted, {pipeline.counts['updated']} updated, "
+              f"{pipeline.counts['unchanged']} unchanged).")
+
+        # Older history feeds the long horizons (12M, YTD) of the snapshot
+        if pipeline.changed_symbols:
+            self.db.refresh_ticker_performance(sorted(set(pipeline.changed_symbols)))
+
+        status = self.ledger.finish_job(job_id)
+        print(f"\n[Ledger] Job {job_id} {status}.")
+        self.ledger.print_report(job_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill historical daily prices in yearly chunks.")
+    parser.add_argument("--start", required=True, help="First date to load (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Exclusive end date (YYYY-MM-DD), default today")
+    parser.add_argument("--industry", help="Only tickers of this industry")
+    parser.add_argument("--tickers", help="Comma separated tickers (default: all registered); unknown ones are registered")
+    parser.add_argument("--workers", type=int, help="Concurrent downloads (default FETCH_WORKERS)")
+    parser.add_argument("--shard", type=parse_shard, help="Only process shard i of N (e.g. 2/4)")
+    args = parser.parse_args()
+
+    backfiller = Backfiller(workers=args.workers, shard=args.shard)
+    tickers = [t.strip() for t in args.tickers.split(',') if t.strip()] if args.tickers else None
+    backfiller.run(args.start, args.end, tickers=tickers, industry=args.industry)
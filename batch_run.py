@@ -1,10 +1,17 @@
 from market_data_fetcher import MarketDataFetcher
 from market_data_db import MarketDataDB
+from fetch_scheduler import FetchScheduler
+from ingest_ledger import IngestLedger
+from sharding import parse_shard, select_shard, shard_job_key
+from universe_loader import load_universe, sheet_tickers
+import argparse
 import pandas as pd
-import time
 import os
 from tqdm import tqdm
 
+# Tickers per ledger checkpoint and price upsert
+CHECKPOINT_BATCH_SIZE = 50
+
 class BatchController:
     """
     Orchestrates the batch processing of stock data from an Excel file to the database.
@@ -16,10 +23,14 @@ class BatchController:
         try:
             self.db = MarketDataDB()
             self.fetcher = MarketDataFetcher()
+            # Shared by fundamentals and prices so the request rate is enforced across both
+            self.scheduler = FetchScheduler()
+            self.ledger = IngestLedger(self.db)
         except Exception as e:
             raise RuntimeError(f"Failed to initialize components: {e}")
 
-    def run(self, start_date: str, end_date: str, target_industry: str = None, missing_only: bool = False):
+    def run(self, start_date: str, end_date: str, target_industry: str = None, missing_only: bool = False,
+            shard: tuple = None):
         """
         Main execution loop.
         Iterates through all sheets in the Excel file, fetches data for each ticker,
@@ -28,14 +39,16 @@ class BatchController:
         Args:
             target_industry (str): If provided, only process this specific industry (Sheet).
             missing_only (bool): If True, skip industries that already exist in the DB.
+                                 Checked once at startup, so start all shards together.
+            shard (tuple): Optional (i, N) from sharding.parse_shard; only tickers owned
+                           by shard i of N are processed, with their own ledger job.
         """
         print(f"Reading Excel file: {self.excel_path}...")
         
         try:
-            # Load Excel File mapping (efficient for mapping sheet names)
-            xls = pd.ExcelFile(self.excel_path)
-            sheet_names = xls.sheet_names
-            print(f"Found {len(sheet_names)} sheets (Industries).")
+            # Parsed once (all sheets, industry names resolved) and cached until the workbook changes
+            universe = sheet_tickers(load_universe(self.excel_path))
+            print(f"Found {len(universe)} sheets (Industries).")
 
             # Pre-fetch existing industries if in missing_only mode
             existing_industries = set()
@@ -52,30 +65,13 @@ class BatchController:
             return
 
         # Iterate through each Industry (Sheet)
-        for sheet_name in sheet_names:
+        for sheet_name, (final_industry_name, listed_tickers) in universe.items():
             # --- Filter Logic ---
             if target_industry and sheet_name != target_industry:
                 continue # Skip irrelevant sheets
             
             print(f"\n------------------------------------------------")
             print(f"Processing Industry: {sheet_name}")
-            
-            # --- Name Resolution (Peeking) ---
-            # We need to know the 'Real Name' to check if it's missing.
-            # Read just a few rows to get the Industry column.
-            try:
-                df_peek = pd.read_excel(xls, sheet_name=sheet_name, nrows=5)
-            except Exception as e:
-                print(f"Error peeking sheet '{sheet_name}': {e}")
-                continue
-
-            # Determine Correct Industry Name
-            final_industry_name = sheet_name
-            if 'Industry' in df_peek.columns and not df_peek['Industry'].dropna().empty:
-                candidate_name = df_peek['Industry'].dropna().iloc[0]
-                if isinstance(candidate_name, str) and len(candidate_name) > 3:
-                    final_industry_name = candidate_name.strip()
-            
             print(f"   -> Identified as: '{final_industry_name}'")
 
             # --- Missing Only Check ---
@@ -86,73 +82,93 @@ class BatchController:
             print(f"------------------------------------------------")
             
             try:
-                # Read FULL sheet now
-                df_sheet = pd.read_excel(xls, sheet_name=sheet_name)
-                
-                # Check for 'Ticker' column
-                if 'Ticker' not in df_sheet.columns:
-                    print(f"Warning: Sheet '{sheet_name}' missing 'Ticker' column (Skipping).")
-                    continue
-                
                 # 2. Register Industry (with potentially corrected name)
                 industry_id = self.db.get_or_create_industry(final_industry_name)
                 
-                # Check for 'Ticker' column
-                if 'Ticker' not in df_sheet.columns:
-                    print(f"Warning: Sheet '{sheet_name}' missing 'Ticker' column (Skipping).")
-                    continue
-                
                 # Get unique clean tickers
-                tickers = df_sheet['Ticker'].dropna().unique().tolist()
-                print(f"Found {len(tickers)} tickers in {sheet_name}")
-                
-                # Ticker Loop with Progress Bar
-                # desc defaults to progress bar description
-                pbar = tqdm(tickers, desc=f"Fetching {sheet_name}")
+                tickers = select_shard(listed_tickers, shard)
+                print(f"Found {len(tickers)} tickers in {sheet_name}" + (f" (shard {shard[0]}/{shard[1]})" if shard else ""))
                 
-                for ticker in pbar:
-                    pbar.set_postfix({'ticker': ticker})
-                    
-                    # 2. Get Info (Fundamentals)
-                    info = self.fetcher.get_ticker_info(ticker)
-                    
-                    # 3. Register Ticker (Hierarchical + Metadata)
-                    self.db.register_ticker(ticker, industry_id, info=info)
-                    
-                    # 4. Fetch & Save Prices
-                    self._process_single_ticker(ticker, start_date, end_date)
-                    
-                    # Rate Limiting
-                    time.sleep(1.0) 
+                # Checkpoint per ticker; a rerun of an interrupted industry only processes what is left
+                job_key = shard_job_key(f"{final_industry_name}|{start_date}|{end_date}", shard)
+                job_id, todo = self.ledger.open_job('batch_run', job_key, tickers)
+
+                # 2. Get Info (Fundamentals) for every ticker (concurrent, rate limited)
+                records = []
+                info_results = self.scheduler.run(self.fetcher.get_ticker_info, todo)
+                for ticker, info, error in tqdm(info_results, total=len(todo), desc=f"Fundamentals {sheet_name}"):
+                    records.append({'ticker': ticker, 'industry_id': industry_id, **(info or {})})
+
+                # 3. Register Tickers (Hierarchical + Metadata) in one round trip
+                self.db.register_tickers(records)
+
+                # 4. Fetch & Save Prices
+                # Downloads run on the scheduler's workers (one at a time, see MarketDataFetcher);
+                # each batch of tickers is saved in one upsert and checkpointed in one ledger
+                # round trip per status
+                progress = tqdm(total=len(todo), desc=f"Fetching {sheet_name}")
+                for i in range(0, len(todo), CHECKPOINT_BATCH_SIZE):
+                    batch = todo[i:i + CHECKPOINT_BATCH_SIZE]
+                    self.ledger.mark_started(job_id, batch)
+                    fetched, failed, skipped = {}, {}, {}
+                    price_results = self.scheduler.run(
+                        lambda ticker: self.fetcher.fetch_us_daily_close(ticker, start_date, end_date), batch)
+                    for ticker, df, error in price_results:
+                        progress.update(1)
+                        if error is not None:
+                            print(f"    System Error processing {ticker}: {error}")
+                            failed[ticker] = error
+                        elif df is None or df.empty:
+                            # Fetcher already logs warning
+                            skipped[ticker] = "No data returned"
+                        else:
+                            fetched[ticker] = df
+                    self.ledger.mark_failed(job_id, failed)
+                    self.ledger.mark_failed(job_id, skipped, status='skipped')
+                    self.ledger.mark_fetched(job_id, {ticker: len(df) for ticker, df in fetched.items()})
+                    self._save_prices(job_id, fetched)
+                progress.close()
+
+                print(self.scheduler.summary())
+                print(f"[Ledger] Job {job_id} {self.ledger.finish_job(job_id)}.")
+                self.ledger.print_report(job_id)
+
+                # 5. Refresh Derived Performance Snapshot for this industry
+                self.db.refresh_ticker_performance(tickers)
             
             except Exception as e:
                 print(f"Error processing sheet '{sheet_name}': {e}")
                 continue
     
-    def _process_single_ticker(self, ticker: str, start_date: str, end_date: str):
+    def _save_prices(self, job_id: int, frames: dict):
         """
-        Handles the Fetch -> Transform -> Save logic for a single ticker.
+        Handles the Transform -> Save -> Checkpoint logic for a batch of fetched tickers.
         Safely handles errors to prevent loop interruption.
+
+        Args:
+            frames (dict): {ticker: price DataFrame from fetch_us_daily_close}
         """
+        if not frames:
+            return
         try:
-            # 1. Fetch
-            df = self.fetcher.fetch_us_daily_close(ticker, start_date, end_date)
+            # 1. Transform (Inject Symbol for DB)
+            for ticker, df in frames.items():
+                df['symbol'] = ticker
             
-            if df is None or df.empty:
-                # Fetcher already logs warning, so we just return
-                return
-
-            # 2. Transform (Inject Symbol for DB)
-            df['symbol'] = ticker
-            
-            # 3. Save
-            self.db.save_daily_data(df)
+            # 2. Save (one upsert for the whole batch)
+            self.db.save_daily_data(pd.concat(frames.values()))
+            self.ledger.mark_done(job_id, list(frames))
             
         except Exception as e:
             # Catch-all for unexpected errors (e.g., DB connection drop, weird data format)
-            print(f"    System Error processing {ticker}: {e}")
+            print(f"    System Error saving {len(frames)} tickers: {e}")
+            self.ledger.mark_failed(job_id, {ticker: e for ticker in frames})
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch load industries from the Excel universe.")
+    parser.add_argument("--shard", type=parse_shard, help="Only process shard i of N (e.g. 2/4)")
+    args = parser.parse_args()
+
     # --- Configuration ---
     EXCEL_FILE = "US_Stocks_Classified.xlsx"
     START_DATE = "2024-01-01"
@@ -171,7 +187,7 @@ if __name__ == "__main__":
     
     try:
         controller = BatchController(EXCEL_FILE)
-        controller.run(START_DATE, END_DATE, target_industry=TARGET_INDUSTRY)
+        controller.run(START_DATE, END_DATE, target_industry=TARGET_INDUSTRY, shard=args.shard)
         print("\nBatch Job Completed Successfully.")
     except Exception as e:
         print(f"\nBatch Job Failed: {e}")
@@ -1,16 +1,50 @@
+import argparse
+import sys
 import pandas as pd
 from market_data_db import MarketDataDB
-from market_data_fetcher import MarketDataFetcher
+from market_data_fetcher import MarketDataFetcher, NO_DATA
+from fetch_scheduler import FetchScheduler
+from ingest_pipeline import IngestPipeline
+from ingest_ledger import IngestLedger, IN_PROGRESS
+from trading_calendar import previous_session, is_trading_day, session_offset
+from sharding import parse_shard, select_shard, shard_job_key
 from sqlalchemy import text
-from datetime import datetime, timedelta
-import time
-from tqdm import tqdm
+from datetime import timedelta
+
+# First fetch date for tickers that have never been ingested
+DEFAULT_START_DATE = "2024-01-01"
+# Symbols per yfinance multi-ticker download
+FETCH_BATCH_SIZE = 100
+# Sessions re-fetched before each watermark, so late adj_close/volume corrections are picked up
+WATERMARK_OVERLAP_SESSIONS = 3
+# After this many consecutive failures (e.g. delisted or renamed) a ticker is only retried
+# every 2, 4, 8... days, up to MAX_BACKOFF_DAYS
+FAILURE_BACKOFF_AFTER = 3
+MAX_BACKOFF_DAYS = 30
+
+def parse_session(value: str):
+    """argparse type for --date: a YYYY-MM-DD NYSE session."""
+    try:
+        day = pd.Timestamp(value).date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{value}', expected YYYY-MM-DD")
+    if not is_trading_day(day):
+        raise argparse.ArgumentTypeError(f"{day} is not an NYSE session")
+    return day
 
 class DailyUpdater:
-    def __init__(self):
-        print("Initializing Daily Updater...")
+    def __init__(self, shard: tuple = None):
+        """
+        Args:
+            shard (tuple): Optional (i, N) from sharding.parse_shard; only tickers owned by
+                           shard i of N are updated and the snapshot refresh is left to finalize().
+        """
+        print("Initializing Daily Updater..." + (f" (shard {shard[0]}/{shard[1]})" if shard else ""))
+        self.shard = shard
         self.db = MarketDataDB()
         self.fetcher = MarketDataFetcher()
+        self.scheduler = FetchScheduler()
+        self.ledger = IngestLedger(self.db)
         
     def get_active_tickers(self):
         """Fetches all registered tickers from the database."""
@@ -19,81 +53,244 @@ class DailyUpdater:
             tickers = conn.execute(text("SELECT ticker FROM tickers ORDER BY ticker")).fetchall()
             return [t[0] for t in tickers]
 
-    def get_last_update_date(self):
+    def get_fetch_plan(self, latest_session=None):
         """
-        Gets the maximum date currently in the database to determine start date.
-        Returns a string 'YYYY-MM-DD'.
+        Builds the per-ticker fetch ranges from `ticker_watermarks`.
+        Each ticker is requested from WATERMARK_OVERLAP_SESSIONS sessions before its
+        watermark; tickers that already hold the latest completed session are skipped,
+        and so are repeatedly failing tickers until their backoff expires.
+
+        Args:
+            latest_session (date): Most recent completed session. Defaults to the
+                                   NYSE session before today (weekends/holidays skipped).
+
+        Returns:
+            tuple: (list of (ticker, start_date 'YYYY-MM-DD'), number of current tickers skipped,
+                    number of failing tickers backed off)
         """
-        with self.db.engine.connect() as conn:
-            # Find the latest date across all prices
-            # (In a perfect world we check per ticker, but for daily batch, global max or T-3 is usually safe)
-            result = conn.execute(text("SELECT MAX(date) FROM us_daily_prices")).scalar()
-            
-            if result:
-                # Start from the NEXT day
-                next_day = result + timedelta(days=1)
-                return next_day.strftime('%Y-%m-%d')
+        watermarks = self.db.get_watermarks()
+        owned = set(select_shard(watermarks['ticker'], self.shard))
+        if latest_session is None:
+            latest_session = previous_session(pd.Timestamp.now())
+
+        plan = []
+        current = backed_off = 0
+        for row in watermarks.itertuples(index=False):
+            if row.ticker not in owned:
+                continue
+            last_date = row.last_date
+            if last_date is not None and not pd.isna(last_date) and last_date >= latest_session:
+                current += 1
+            elif self._backing_off(row.failure_count, row.days_since_attempt):
+                backed_off += 1
+            elif last_date is None or pd.isna(last_date):
+                plan.append((row.ticker, DEFAULT_START_DATE))
             else:
-                # If DB is empty, default safely
-                return "2024-01-01"
+                start = session_offset(last_date, -WATERMARK_OVERLAP_SESSIONS)
+                plan.append((row.ticker, pd.Timestamp(start).strftime('%Y-%m-%d')))
+        return plan, current, backed_off
+
+    @staticmethod
+    def _backing_off(failure_count: int, days_since_attempt) -> bool:
+        if failure_count < FAILURE_BACKOFF_AFTER or days_since_attempt is None or pd.isna(days_since_attempt):
+            return False
+        wait_days = min(2 ** (failure_count - FAILURE_BACKOFF_AFTER + 1), MAX_BACKOFF_DAYS)
+        return days_since_attempt < wait_days
 
-    def run(self):
+    def run(self, session=None):
+        """
+        Args:
+            session (date): Session to update up to; also the ledger job key, so every shard
+                            and finalize() of one run must use the same value. Defaults to the
+                            latest completed NYSE session.
+        """
         print("--- Starting Daily Stock Update ---")
         
-        # 1. Get Tickers
-        tickers = self.get_active_tickers()
-        print(f"Found {len(tickers)} active tickers in database.")
-        
-        if not tickers:
-            print("No tickers found. Nothing to update.")
+        # 1. Get Tickers & Per-Ticker Ranges (watermark - overlap -> session)
+        # Only sessions produce new bars: after a weekend or holiday the latest completed
+        # session is unchanged, every ticker is current and no API call is made
+        today = pd.Timestamp.now()
+        latest_session = session or previous_session(today)
+        print(f"{'Requested' if session else 'Latest completed'} session: {latest_session} "
+              f"(today is {'a' if is_trading_day(today) else 'not a'} trading day)")
+        plan, current_count, backed_off = self.get_fetch_plan(latest_session)
+        print(f"Found {len(plan) + current_count + backed_off} active tickers in database "
+              f"({current_count} already current, {backed_off} backed off after repeated failures, "
+              f"{len(plan)} to fetch).")
+
+        # 2. Determine End Date (yfinance treats `end` as exclusive)
+        end_date = (latest_session + timedelta(days=1)).strftime('%Y-%m-%d')
+        job_key = shard_job_key(latest_session.strftime('%Y-%m-%d'), self.shard)
+
+        # An attempt for this session that stopped before finish_job is still 'running'. It is
+        # resumed even when nothing is left to fetch, so it gets finished (and its tickers
+        # refreshed); items it left in progress that are no longer planned have nothing left
+        # to fetch in this job (refreshing them is harmless)
+        previous = self.ledger.find_job('daily_update', job_key)
+        interrupted = previous is not None and previous['status'] in ('running', 'incomplete')
+        if interrupted:
+            planned = {t for t, _ in plan}
+            self.ledger.mark_done(previous['id'], [t for status in IN_PROGRESS
+                                                   for t in self.ledger.job_items(previous['id'], status)
+                                                   if t not in planned])
+
+        if not plan and not interrupted:
+            if self.shard and previous is None:
+                # Still record the shard as complete so finalize() can verify it
+                self.ledger.finish_job(self.ledger.open_job('daily_update', job_key, [])[0])
+            print("Nothing to update.")
             return
 
-        # 2. Determine Date Range
-        # Ideally we want to fill gaps. 
-        # Strategy: Fetch from (Today - 3 days) to Today. 
-        # The DB 'upsert' logic handles duplicates, so slight overlap is cleaner than missing data.
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=5)).strftime('%Y-%m-%d')
-        
-        print(f"Update Range: {start_date} -> {end_date}")
-        print("(Fetching last 5 days to ensure no gaps/corrections are missed)")
+        print(f"Update Range: <watermark - {WATERMARK_OVERLAP_SESSIONS} sessions> -> {end_date}")
+
+        # Checkpoint per ticker; a rerun for the same session resumes the unfinished job
+        job_id, todo = self.ledger.open_job('daily_update', job_key, [t for t, _ in plan])
+        # Tickers an interrupted attempt already wrote are not fetched again but still need
+        # the snapshot refresh that attempt never reached
+        written_before = self.ledger.job_items(job_id, status='done')
+        todo = set(todo)
+        plan = [(t, start_date) for t, start_date in plan if t in todo]
         
         # 3. Batch Process
-        success_count = 0
+        # Tickers sharing a watermark share a date range, so they can share batched downloads
+        by_start = {}
+        for ticker, start_date in plan:
+            by_start.setdefault(start_date, []).append(ticker)
+        jobs = [(start_date, tickers[i:i + FETCH_BATCH_SIZE])
+                for start_date, tickers in sorted(by_start.items())
+                for i in range(0, len(tickers), FETCH_BATCH_SIZE)]
+        print(f"Fetching {len(jobs)} batches ({self.scheduler.workers} workers, "
+              f"{self.scheduler.rate:.1f} symbol requests/s)...")
+
         skip_count = 0
         error_count = 0
-        
-        pbar = tqdm(tickers, desc="Updating Prices")
-        
-        for ticker in pbar:
-            try:
-                # Fetch
-                df = self.fetcher.fetch_us_daily_close(ticker, start_date, end_date)
-                
-                if df is None or df.empty:
-                    skip_count += 1
+        failures = {}
+
+        # Fetch workers hand frames to a single writer that commits multi-ticker batches;
+        # when the writer falls behind its bounded queue blocks the workers (backpressure)
+        pipeline = IngestPipeline(self.db.save_daily_data,
+                                  on_written=lambda batch: self.ledger.mark_done(job_id, batch['symbol'].unique().tolist()))
+
+        def fetch_batch(job):
+            start_date, tickers = job
+            self.ledger.mark_started(job_id, tickers)
+            df, batch_failures = self.fetcher.fetch_many(tickers, start_date, end_date,
+                                                         batch_size=len(tickers), pause=0)
+            if not df.empty:
+                self.ledger.mark_fetched(job_id, df['symbol'].value_counts().to_dict())
+            pipeline.put(df)
+            return df, batch_failures
+
+        # yfinance sends one request per symbol, so a batch costs len(tickers) tokens
+        results = self.scheduler.run(fetch_batch, jobs, cost=lambda job: len(job[1]))
+        with pipeline:
+            for (start_date, tickers), result, fetch_error in results:
+                if fetch_error is not None:
+                    error_count += len(tickers)
+                    failures.update({t: fetch_error for t in tickers if t not in failures})
+                    self.ledger.mark_failed(job_id, {t: fetch_error for t in tickers})
+                    print(f"Failed batch from {start_date}: {fetch_error}")
                     continue
+                batch_failures = result[1]
+                # Only a window Yahoo confirms as empty is final for this job; throttled or
+                # timed-out symbols stay 'failed' so a rerun retries them
+                no_data = {t: e for t, e in batch_failures.items() if e == NO_DATA}
+                errors = {t: e for t, e in batch_failures.items() if t not in no_data}
+                # The window overlaps sessions already stored, so a confirmed empty one means the
+                # ticker stopped trading (delisted, renamed): it counts toward the backoff
+                failures.update(batch_failures)
+                skip_count += len(no_data)
+                error_count += len(errors)
+                self.ledger.mark_failed(job_id, no_data, status='skipped')
+                self.ledger.mark_failed(job_id, errors)
+
+        print(self.scheduler.summary())
+        print(f"[Pipeline] Wrote {len(pipeline.written_symbols)} tickers in {pipeline.batches} transactions.")
+
+        # Fetched but not written (failed transaction): treat like fetch errors
+        error_count += len(pipeline.failures)
+        failures.update(pipeline.failures)
+        self.ledger.mark_failed(job_id, pipeline.failures)
+        success_count = len(pipeline.written_symbols)
+        row_counts = pipeline.counts
+        updated_tickers = sorted(set(pipeline.changed_symbols) | set(written_before))
+
+        # Watermarks of failed tickers stay put, so the next run retries the same range
+        # (with backoff once failures repeat)
+        self.db.record_fetch_failures(failures)
                 
-                # Transform
-                df['symbol'] = ticker
-                
-                # Save (Upsert)
-                self.db.save_daily_data(df)
-                success_count += 1
-                
-                # Rate limit (be nice to yfinance)
-                time.sleep(0.2)
-                
-            except Exception as e:
-                error_count += 1
-                # print(f"Failed {ticker}: {e}") # Optional: verify verbose
-                
+        # 4. Refresh Derived Performance Snapshot (only tickers whose prices changed)
+        if self.shard:
+            print("[Shard] Snapshot refresh deferred to --finalize (after every shard completes).")
+        elif updated_tickers:
+            self.db.refresh_ticker_performance(updated_tickers)
+
+        status = self.ledger.finish_job(job_id)
+        print(f"\n[Ledger] Job {job_id} {status}.")
+        self.ledger.print_report(job_id)
+
         print("\n--- Update Completed ---")
-        print(f"Processed: {len(tickers)}")
+        print(f"Processed: {len(plan)} (+{current_count} already current)")
         print(f"Success:   {success_count}")
         print(f"Skipped:   {skip_count} (No new data)")
         print(f"Errors:    {error_count}")
+        print(f"Rows:      {row_counts['inserted']} inserted, {row_counts['updated']} updated, {row_counts['unchanged']} unchanged")
+        print(f"Changed:   {len(updated_tickers)} tickers")
+
+    def finalize(self, shard_count: int, session=None) -> bool:
+        """
+        Post-step for sharded runs: verifies that all `shard_count` shards of the
+        session's update ran to the end, then refreshes the performance snapshot for
+        every ticker they wrote.
+
+        Args:
+            session (date): The session the shards ran for (same default as run()).
+
+        Returns:
+            bool: False (nothing refreshed) if any shard is missing or unfinished (rerun that
+                  shard: it resumes where it stopped). Tickers that failed in a finished shard
+                  are reported but do not block the refresh; their watermarks stay put, so the
+                  next run retries them.
+        """
+        session_key = (session or previous_session(pd.Timestamp.now())).strftime('%Y-%m-%d')
+        print(f"--- Finalizing {shard_count} shards for session {session_key} ---")
+
+        jobs, problems = [], []
+        for index in range(1, shard_count + 1):
+            job = self.ledger.find_job('daily_update', shard_job_key(session_key, (index, shard_count)))
+            if job is None:
+                problems.append(f"shard {index}/{shard_count}: no run recorded")
+            elif job['finished_at'] is None or job['in_progress']:
+                problems.append(f"shard {index}/{shard_count}: job {job['id']} unfinished "
+                                f"({job['in_progress']} items in progress)")
+            else:
+                failed = f" ({job['failed']} tickers failed)" if job['failed'] else ""
+                print(f"[Shard] {index}/{shard_count}: job {job['id']} {job['status']}{failed}")
+                jobs.append(job)
+
+        if problems:
+            for problem in problems:
+                print(f"[Shard] {problem}")
+            print("Finalize aborted: derived tables were not refreshed.")
+            return False
+
+        written = [s for job in jobs for s in self.ledger.job_items(job['id'], status='done')]
+        if written:
+            self.db.refresh_ticker_performance(written)
+        print(f"Finalize completed: {len(written)} tickers refreshed.")
+        return True
 
 if __name__ == "__main__":
-    updater = DailyUpdater()
-    updater.run()
+    parser = argparse.ArgumentParser(description="Incremental daily price update.")
+    parser.add_argument("--shard", type=parse_shard, help="Only update shard i of N (e.g. 2/4)")
+    parser.add_argument("--finalize", type=int, metavar="N",
+                        help="Verify that shards 1..N completed for the session, then refresh derived tables")
+    parser.add_argument("--date", type=parse_session,
+                        help="Session to update / finalize (YYYY-MM-DD, default: latest completed session). "
+                             "Pass the same value to every shard and to --finalize")
+    args = parser.parse_args()
+
+    updater = DailyUpdater(shard=args.shard)
+    if args.finalize:
+        sys.exit(0 if updater.finalize(args.finalize, session=args.date) else 1)
+    updater.run(session=args.date)
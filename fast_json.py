@@ -0,0 +1,68 @@
+import json
+import numpy as np
+import pandas as pd
+from fastapi.responses import Response
+
+# orjson is optional: it serializes NumPy scalars/arrays natively and is several
+# times faster than the stdlib encoder. Without it we fall back to json.dumps.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    # Only reached on the stdlib fallback path
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        value = float(obj)
+        return value if np.isfinite(value) else None
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(obj).isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> bytes:
+    """
+    Serializes a payload to compact UTF-8 JSON bytes.
+    orjson writes NaN/Inf as null; the stdlib fallback rejects them, so frames
+    should go through clean_records first.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+                      default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSONResponse replacement that encodes with dumps() (orjson when installed)."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def clean_records(df: pd.DataFrame, float_cols=(), int_cols=(), str_cols=()) -> list:
+    """
+    Converts selected frame columns into JSON-ready records in one vectorized pass.
+
+    float_cols: NaN/Inf -> None, otherwise Python float.
+    int_cols:   NaN/Inf -> 0, otherwise Python int.
+    str_cols:   passed through (NaN -> None).
+    """
+    out = {}
+    for col in float_cols:
+        values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64')
+        out[col] = np.where(np.isfinite(values), values, None)
+    for col in int_cols:
+        values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64')
+        out[col] = np.where(np.isfinite(values), values, 0).astype('int64').astype(object)
+    for col in str_cols:
+        out[col] = np.where(df[col].notna().to_numpy(), df[col].to_numpy(dtype=object), None)
+
+    # Zip the converted arrays directly; a DataFrame round trip would re-infer dtypes (None -> NaN)
+    ordered = [c for c in df.columns if c in out]
+    return [dict(zip(ordered, row)) for row in zip(*(out[c].tolist() for c in ordered))]
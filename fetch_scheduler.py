@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Defaults, overridable per deployment
+DEFAULT_WORKERS = int(os.getenv("FETCH_WORKERS", "4"))
+DEFAULT_RATE = float(os.getenv("FETCH_RATE", "5"))          # Upstream requests (symbols) per second to start at
+DEFAULT_MAX_RATE = float(os.getenv("FETCH_MAX_RATE", "20"))  # Ceiling for adaptive increases
+DEFAULT_MIN_RATE = 0.2
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire(n) blocks until n tokens are available,
+    so every worker sharing a bucket stays under `rate` requests per second overall.
+    A cost above the capacity waits for a full bucket and leaves it in debt, which
+    later callers pay back before they get tokens.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0):
+        needed = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return
+                wait = (needed - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+
+def _default_is_empty(result) -> bool:
+    if result is None:
+        return True
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    if isinstance(result, (dict, list)):
+        return not result
+    return bool(getattr(result, 'empty', False))
+
+
+class FetchScheduler:
+    """
+    Runs fetch calls on a worker pool behind a shared TokenBucket.
+
+    The rate adapts AIMD-style: every success adds a small step (up to max_rate);
+    an error or empty result halves it (down to min_rate), at most once per
+    cooldown so a burst of parallel failures counts as one signal.
+
+    Args:
+        workers (int): Concurrent fetches.
+        rate (float): Initial requests per second across all workers.
+        max_rate / min_rate (float): Bounds for the adaptive rate.
+        is_empty (callable): Classifies a result as empty (treated like an error
+                             for backoff). Defaults to None, {} and .empty frames.
+    """
+
+    def __init__(self, workers: int = None, rate: float = None, max_rate: float = None,
+                 min_rate: float = DEFAULT_MIN_RATE, is_empty=None, cooldown: float = 2.0):
+        self.workers = workers or DEFAULT_WORKERS
+        self.max_rate = max_rate or max(DEFAULT_MAX_RATE, rate or DEFAULT_RATE)
+        self.min_rate = min_rate
+        self.bucket = TokenBucket(rate or DEFAULT_RATE, capacity=max(1.0, rate or DEFAULT_RATE))
+        self.is_empty = is_empty or _default_is_empty
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._last_backoff = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.empties = 0
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def _record(self, ok: bool):
+        with self._lock:
+            if ok:
+                step = self.max_rate / 20
+                self.bucket.set_rate(min(self.max_rate, self.bucket.rate + step))
+                return
+            now = time.monotonic()
+            if now - self._last_backoff >= self.cooldown:
+                self._last_backoff = now
+                self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+
+    def _call(self, fn, item, cost):
+        requests = cost(item) if cost else 1
+        self.bucket.acquire(requests)
+        with self._lock:
+            self.requests += requests
+        try:
+            result = fn(item)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            self._record(False)
+            raise
+        empty = self.is_empty(result)
+        if empty:
+            with self._lock:
+                self.empties += 1
+        self._record(not empty)
+        return result
+
+    def run(self, fn, items, cost=None):
+        """
+        Applies fn to every item concurrently, respecting the shared rate limit.
+
+        Args:
+            fn (callable): Called as fn(item).
+            items (iterable): Work items (e.g. tickers or symbol batches).
+            cost (callable): Upstream requests one item makes, e.g. len of a symbol batch
+                             (yfinance sends one request per symbol). Defaults to 1 each.
+
+        Yields:
+            tuple: (item, result, error) in completion order; error is None on success.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fetch") as pool:
+            futures = {pool.submit(self._call, fn, item, cost): item for item in items}
+            for future in as_completed(futures):
+                # Drop our reference so results are freed once the caller is done with them
+                item = futures.pop(future)
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+
+    def summary(self) -> str:
+        with self._lock:
+            return (f"[Scheduler] {self.requests} requests, {self.errors} errors, "
+                    f"{self.empties} empty, final rate {self.bucket.rate:.1f}/s")
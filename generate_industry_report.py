@@ -3,6 +3,12 @@ from sqlalchemy import text
 import pandas as pd
 import datetime
 import json
+from price_history import build_histories
+from returns_engine import compute_returns, column_name, DEFAULT_HORIZONS
+from performance_snapshot import LOOKBACK_DAYS
+
+# Points kept per ticker in the inline sparkline data (LTTB keeps the chart shape)
+REPORT_MAX_POINTS = 200
 
 def generate_industry_report(target_industry: str):
     print(f"Generating Professional Report for: {target_industry}...")
@@ -24,79 +30,49 @@ def generate_industry_report(target_industry: str):
                 print("No tickers found.")
                 return
 
-            # 2. Process Price History & Metrics
-            stats_list = []
-            stock_data_map = {}
-
-            # Helper for % Change
-            def get_pct_change(current_price, old_price):
-                if old_price is None or old_price == 0: return 0.0
-                return ((current_price - old_price) / old_price) * 100
-
-            for index, row in df_funds.iterrows():
-                ticker = row['ticker']
-                
-                # Fetch 400 days
-                query_price = text("""
-                    SELECT date, close, volume
-                    FROM us_daily_prices
-                    WHERE symbol = :ticker
-                    ORDER BY date DESC
-                    LIMIT 400
-                """)
-                df_price = pd.read_sql(query_price, conn, params={"ticker": ticker})
-                
-                # Metrics Calculation
-                metrics = {'Volume': 0, '1D': 0.0, '1M': 0.0, '2M': 0.0, '3M': 0.0, '6M': 0.0, '12M': 0.0, 'YTD': 0.0}
-                
-                if not df_price.empty:
-                    # 1. Prepare JSON Data for Chart
-                    chart_series = []
-                    for _, p_row in df_price.iloc[::-1].iterrows():
-                         chart_series.append({
-                             'x': p_row['date'].strftime('%Y-%m-%d'),
-                             'y': float(p_row['close'])
-                         })
-                    stock_data_map[ticker] = chart_series
-
-                    # 2. Logic Calc
-                    df_price['date'] = pd.to_datetime(df_price['date'])
-                    latest = df_price.iloc[0]
-                    latest_date = latest['date']
-                    latest_price = latest['close']
-                    metrics['Volume'] = latest['volume']
-                    
-                    if len(df_price) >= 2:
-                        metrics['1D'] = get_pct_change(latest_price, df_price.iloc[1]['close'])
-
-                    def find_price_days_ago(days):
-                        target_date = latest_date - pd.Timedelta(days=days)
-                        for _, p_row in df_price.iterrows():
-                            if p_row['date'] <= target_date: return p_row['close']
-                        return None
-
-                    metrics['1M'] = get_pct_change(latest_price, find_price_days_ago(30))
-                    metrics['2M'] = get_pct_change(latest_price, find_price_days_ago(60))
-                    metrics['3M'] = get_pct_change(latest_price, find_price_days_ago(90))
-                    metrics['6M'] = get_pct_change(latest_price, find_price_days_ago(180))
-                    metrics['12M'] = get_pct_change(latest_price, find_price_days_ago(365))
-
-                    start_of_year = datetime.datetime(latest_date.year, 1, 1)
-                    ytd_price = None
-                    for _, p_row in df_price.iterrows():
-                        if p_row['date'] <= start_of_year:
-                             ytd_price = p_row['close']
-                             break
-                    if ytd_price is None: ytd_price = df_price.iloc[-1]['close']
-                    metrics['YTD'] = get_pct_change(latest_price, ytd_price)
-
-                stats_list.append({ 'Symbol': ticker, **metrics })
-            
-            df_final = pd.merge(df_funds, pd.DataFrame(stats_list), left_on='ticker', right_on='Symbol')
+            # 2. Process Price History & Metrics (one query, one vectorized pass)
+            query_price = text("""
+                SELECT p.symbol AS ticker, p.date, p.close, p.volume
+                FROM us_daily_prices p
+                JOIN tickers t ON p.symbol = t.ticker
+                JOIN industries i ON t.industry_id = i.id
+                WHERE i.name = :industry AND p.date >= :since
+                ORDER BY p.symbol, p.date DESC
+            """)
+            since = datetime.date.today() - datetime.timedelta(days=LOOKBACK_DAYS)
+            df_prices = pd.read_sql(query_price, conn, params={"industry": target_industry, "since": since})
+
+            df_perf = compute_returns(df_prices, DEFAULT_HORIZONS, ticker_col='ticker', date_col='date',
+                                      price_col='close', extra_cols=['volume'])
+            metrics = {'Symbol': df_perf['ticker'], 'Volume': df_perf['volume'].fillna(0)}
+            for horizon in DEFAULT_HORIZONS:
+                metrics[horizon] = df_perf[column_name(horizon)].fillna(0.0)
+            df_metrics = pd.DataFrame(metrics)
+            # Tickers without prices still get a row with zeroed metrics
+            df_stats = df_funds[['ticker']].merge(df_metrics, left_on='ticker', right_on='Symbol', how='left')
+            df_stats['Symbol'] = df_stats['ticker']
+            df_stats = df_stats.drop(columns='ticker').fillna(0)
+
+            # Chart series: latest 400 sessions per ticker
+            chart_frames = df_prices.groupby('ticker').head(400)
+
+            df_final = pd.merge(df_funds, df_stats, left_on='ticker', right_on='Symbol')
             
-            # Serialize stock_data_map to JSON string
+            # Downsample every ticker's series in one batched LTTB call, then serialize
+            stock_data_map = {}
+            if not chart_frames.empty:
+                stock_data_map = build_histories(chart_frames, 'MAX', REPORT_MAX_POINTS,
+                                                 date_col='date', price_col='close', symbol_col='ticker')
             json_stock_data = json.dumps(stock_data_map)
 
+            # 1D tooltip: the last two sessions of the full series (downsampling may drop the second-last)
+            last_two = chart_frames.dropna(subset=['close']).groupby('ticker').head(2).sort_values(['ticker', 'date'])
+            last_sessions_map = {
+                sym: [{'x': pd.Timestamp(d).strftime('%Y-%m-%d'), 'y': float(c)} for d, c in zip(g['date'], g['close'])]
+                for sym, g in last_two.groupby('ticker')
+            }
+            json_last_sessions = json.dumps(last_sessions_map)
+
             # 3. Generate HTML with data attributes
             table_rows = ""
             for i, row in df_final.iterrows():
@@ -284,6 +260,7 @@ def generate_industry_report(target_industry: str):
 
                 <script>
                     var stockData = {json_stock_data};
+                    var lastSessions = {json_last_sessions};
                     var tooltipChart;
 
                     $(document).ready(function () {{
@@ -383,10 +360,14 @@ def generate_industry_report(target_industry: str):
                             if (sliceDays === 'YTD') {{
                                 var curYear = new Date().getFullYear();
                                 filteredData = allData.filter(pt => pt.x.startsWith(curYear));
+                            }} else if (tf === '1D') {{
+                                filteredData = lastSessions[symbol] || allData.slice(-2);
                             }} else {{
-                                var tradingDays = {{ '1D': 2, '1M': 22, '2M': 44, '3M': 66, '6M': 130, '12M': 260 }};
-                                var n_items = tradingDays[tf] || 22; 
-                                filteredData = allData.slice(-n_items);
+                                // Series are downsampled, so slice by date rather than point count
+                                var cutoff = new Date(allData[allData.length - 1].x);
+                                cutoff.setDate(cutoff.getDate() - sliceDays);
+                                var cutoffStr = cutoff.toISOString().slice(0, 10);
+                                filteredData = allData.filter(pt => pt.x >= cutoffStr);
                             }}
                             if (filteredData.length < 2) filteredData = allData.slice(-5);
 
@@ -0,0 +1,239 @@
+"""
+Checkpointed ledger for ingestion runs (daily_update.py, batch_run.py).
+
+Every run is an `ingest_jobs` row identified by (kind, job_key); every ticker
+it handles is an `ingest_job_items` row moving through
+
+    pending -> started -> fetched -> done
+                                  \\-> failed | skipped (no data)
+
+Opening a job whose previous run did not complete resumes it: only items that
+are not done/skipped are handed back. The item timestamps double as per-stage
+throughput numbers:
+
+    python ingest_ledger.py            # recent jobs
+    python ingest_ledger.py --job 42   # per-stage throughput for one job
+"""
+import argparse
+from sqlalchemy import text
+
+# Items that still need work when a job is resumed
+UNFINISHED = ('pending', 'started', 'fetched', 'failed')
+# Items that never reached an end (the run stopped before they were done or failed)
+IN_PROGRESS = ('pending', 'started', 'fetched')
+
+
+class IngestLedger:
+    """
+    Records job and per-item progress in the ingest ledger tables.
+    All mark_* methods take a batch of items and cost one round trip.
+
+    Args:
+        db (MarketDataDB): Provides the engine.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def open_job(self, kind: str, job_key: str, items: list):
+        """
+        Starts a job, or resumes the latest unfinished one with the same kind and key.
+
+        Args:
+            kind (str): Job type, e.g. 'daily_update'.
+            job_key (str): Identifies reruns of the same job (e.g. end date, industry + range).
+            items (list): Tickers the caller wants to process.
+
+        Returns:
+            tuple: (job_id, list of items still to do, in the caller's order)
+        """
+        items = list(dict.fromkeys(items))
+        with self.db.engine.begin() as conn:
+            job_id = conn.execute(text("""
+                SELECT id FROM ingest_jobs
+                WHERE kind = :kind AND job_key = :key AND status <> 'completed'
+                ORDER BY id DESC LIMIT 1
+            """), {"kind": kind, "key": job_key}).scalar()
+
+            resumed = job_id is not None
+            if resumed:
+                conn.execute(text("UPDATE ingest_jobs SET status = 'running', finished_at = NULL WHERE id = :id"),
+                             {"id": job_id})
+            else:
+                job_id = conn.execute(text("""
+                    INSERT INTO ingest_jobs (kind, job_key, status) VALUES (:kind, :key, 'running') RETURNING id
+                """), {"kind": kind, "key": job_key}).scalar()
+
+            if items:
+                conn.execute(text("""
+                    INSERT INTO ingest_job_items (job_id, item) SELECT :id, unnest(CAST(:items AS text[]))
+                    ON CONFLICT (job_id, item) DO NOTHING
+                """), {"id": job_id, "items": items})
+            total = conn.execute(text("SELECT count(*) FROM ingest_job_items WHERE job_id = :id"),
+                                 {"id": job_id}).scalar()
+            conn.execute(text("UPDATE ingest_jobs SET total_items = :n WHERE id = :id"), {"id": job_id, "n": total})
+
+            finished = {r[0] for r in conn.execute(text("""
+                SELECT item FROM ingest_job_items WHERE job_id = :id AND NOT (status = ANY(:unfinished))
+            """), {"id": job_id, "unfinished": list(UNFINISHED)}).fetchall()}
+
+        todo = [item for item in items if item not in finished]
+        if resumed:
+            print(f"[Ledger] Resuming {kind} job {job_id}: {len(todo)} of {len(items)} items left.")
+        else:
+            print(f"[Ledger] Started {kind} job {job_id} with {len(items)} items.")
+        return job_id, todo
+
+    def _update(self, sql: str, job_id: int, rows: list):
+        if not rows:
+            return
+        with self.db.engine.begin() as conn:
+            conn.execute(text(sql), [{"id": job_id, **row} for row in rows])
+
+    def mark_started(self, job_id: int, items: list):
+        self._update("""
+            UPDATE ingest_job_items
+            SET status = 'started', attempts = attempts + 1, started_at = now(),
+                fetched_at = NULL, finished_at = NULL, error = NULL
+            WHERE job_id = :id AND item = :item
+        """, job_id, [{"item": item} for item in items])
+
+    def mark_fetched(self, job_id: int, rows: dict):
+        """rows: {item: number of price rows fetched}"""
+        self._update("""
+            UPDATE ingest_job_items SET status = 'fetched', fetched_at = now(), rows = :rows
+            WHERE job_id = :id AND item = :item
+        """, job_id, [{"item": item, "rows": int(n)} for item, n in rows.items()])
+
+    def mark_done(self, job_id: int, items: list):
+        self._update("""
+            UPDATE ingest_job_items SET status = 'done', finished_at = now(), error = NULL
+            WHERE job_id = :id AND item = :item
+        """, job_id, [{"item": item} for item in items])
+
+    def mark_failed(self, job_id: int, errors: dict, status: str = 'failed'):
+        """errors: {item: error}. status='skipped' records items that are finished without data."""
+        self._update("""
+            UPDATE ingest_job_items SET status = :status, finished_at = now(), error = :error
+            WHERE job_id = :id AND item = :item
+        """, job_id, [{"item": item, "status": status, "error": str(e)[:500]} for item, e in errors.items()])
+
+    def finish_job(self, job_id: int) -> str:
+        """
+        Closes the job: 'completed' when every item is done/skipped, 'partial' when the
+        only leftovers ended with an error, else 'incomplete'. Only 'completed' jobs are
+        final; the others are resumed (and their failures retried) by the next open_job.
+        """
+        with self.db.engine.begin() as conn:
+            status = conn.execute(text("""
+                UPDATE ingest_jobs SET finished_at = now(),
+                    status = CASE
+                        WHEN EXISTS (SELECT 1 FROM ingest_job_items
+                                     WHERE job_id = :id AND status = ANY(:in_progress)) THEN 'incomplete'
+                        WHEN EXISTS (SELECT 1 FROM ingest_job_items
+                                     WHERE job_id = :id AND status = 'failed') THEN 'partial'
+                        ELSE 'completed' END
+                WHERE id = :id
+                RETURNING status
+            """), {"id": job_id, "in_progress": list(IN_PROGRESS)}).scalar()
+        return status
+
+    def find_job(self, kind: str, job_key: str):
+        """
+        Latest job for (kind, job_key), e.g. to check another shard's progress.
+
+        Returns:
+            dict or None: {'id', 'status', 'finished_at', 'in_progress', 'failed'} where in_progress
+                          counts items that were never fetched to an end (pending/started/fetched)
+                          and failed counts items that ended with an error.
+        """
+        with self.db.engine.connect() as conn:
+            row = conn.execute(text("""
+                SELECT j.id, j.status, j.finished_at,
+                       (SELECT count(*) FROM ingest_job_items i
+                        WHERE i.job_id = j.id AND i.status = ANY(:in_progress)) AS in_progress,
+                       (SELECT count(*) FROM ingest_job_items i
+                        WHERE i.job_id = j.id AND i.status = 'failed') AS failed
+                FROM ingest_jobs j
+                WHERE j.kind = :kind AND j.job_key = :key
+                ORDER BY j.id DESC LIMIT 1
+            """), {"kind": kind, "key": job_key, "in_progress": list(IN_PROGRESS)}).fetchone()
+        return dict(row._mapping) if row else None
+
+    def job_items(self, job_id: int, status: str = None) -> list:
+        """Items of a job, optionally only those with the given status."""
+        with self.db.engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT item FROM ingest_job_items
+                WHERE job_id = :id AND (CAST(:status AS text) IS NULL OR status = :status)
+                ORDER BY item
+            """), {"id": job_id, "status": status}).fetchall()
+        return [r[0] for r in rows]
+
+    def throughput(self, job_id: int) -> dict:
+        """
+        Per-stage numbers for a job, from the item timestamps.
+
+        Returns:
+            dict: {'fetch': {...}, 'write': {...}, 'status': {status: count}} where each stage
+                  has items, rows, wall_seconds, items_per_sec and avg_latency_seconds.
+        """
+        with self.db.engine.connect() as conn:
+            row = conn.execute(text("""
+                SELECT
+                    count(fetched_at),
+                    coalesce(sum(rows) FILTER (WHERE fetched_at IS NOT NULL), 0),
+                    extract(epoch FROM max(fetched_at) - min(started_at)),
+                    avg(extract(epoch FROM fetched_at - started_at)),
+                    count(*) FILTER (WHERE status = 'done'),
+                    coalesce(sum(rows) FILTER (WHERE status = 'done'), 0),
+                    extract(epoch FROM max(finished_at) FILTER (WHERE status = 'done') - min(fetched_at)),
+                    avg(extract(epoch FROM finished_at - fetched_at)) FILTER (WHERE status = 'done')
+                FROM ingest_job_items WHERE job_id = :id
+            """), {"id": job_id}).fetchone()
+            statuses = dict(conn.execute(text("""
+                SELECT status, count(*) FROM ingest_job_items WHERE job_id = :id GROUP BY status
+            """), {"id": job_id}).fetchall())
+
+        def stage(items, rows, wall, latency):
+            wall = float(wall) if wall is not None else None
+            return {
+                "items": items,
+                "rows": int(rows),
+                "wall_seconds": round(wall, 2) if wall is not None else None,
+                "items_per_sec": round(items / wall, 2) if wall else None,
+                "avg_latency_seconds": round(float(latency), 3) if latency is not None else None,
+            }
+
+        return {"fetch": stage(*row[0:4]), "write": stage(*row[4:8]), "status": statuses}
+
+    def print_report(self, job_id: int):
+        report = self.throughput(job_id)
+        for name in ("fetch", "write"):
+            s = report[name]
+            print(f"[Ledger] {name:<5}: {s['items']} items, {s['rows']} rows in {s['wall_seconds']}s "
+                  f"({s['items_per_sec']} items/s, avg latency {s['avg_latency_seconds']}s)")
+        print("[Ledger] status: " + ", ".join(f"{k}={v}" for k, v in sorted(report['status'].items())))
+
+
+if __name__ == "__main__":
+    from market_data_db import MarketDataDB
+
+    parser = argparse.ArgumentParser(description="Inspect ingest job ledger.")
+    parser.add_argument("--job", type=int, help="Show per-stage throughput for this job id")
+    parser.add_argument("--limit", type=int, default=10, help="Number of recent jobs to list")
+    args = parser.parse_args()
+
+    db = MarketDataDB()
+    ledger = IngestLedger(db)
+    if args.job:
+        ledger.print_report(args.job)
+    else:
+        with db.engine.connect() as conn:
+            jobs = conn.execute(text("""
+                SELECT id, kind, job_key, status, total_items, started_at, finished_at
+                FROM ingest_jobs ORDER BY id DESC LIMIT :n
+            """), {"n": args.limit}).fetchall()
+        for job in jobs:
+            print(f"  {job.id:>5}  {job.kind:<13} {job.status:<10} {job.total_items or 0:>6} items  "
+                  f"{job.started_at:%Y-%m-%d %H:%M}  {job.job_key}")
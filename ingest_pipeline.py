@@ -0,0 +1,114 @@
+import os
+import queue
+import threading
+import time
+import pandas as pd
+
+# Defaults, overridable per deployment
+INGEST_BATCH_ROWS = int(os.getenv("INGEST_BATCH_ROWS", "50000"))        # Commit once this many rows are pending
+INGEST_FLUSH_SECONDS = float(os.getenv("INGEST_FLUSH_SECONDS", "10"))   # ...or once the oldest pending frame is this old
+INGEST_QUEUE_FRAMES = int(os.getenv("INGEST_QUEUE_FRAMES", "16"))       # Frames buffered before producers block
+
+_STOP = object()
+
+
+class IngestPipeline:
+    """
+    Single writer stage for a producer/consumer ingest.
+
+    Fetch workers put() normalized long-format frames onto a bounded queue; a
+    background thread coalesces them into multi-ticker batches and writes each
+    batch with one save() call (one transaction). A batch is flushed once it
+    holds max_rows rows or its oldest frame has waited max_seconds. put() blocks
+    while the queue is full, so slow writes throttle the fetchers instead of
+    piling frames up in memory.
+
+    Args:
+        save (callable): Writes one DataFrame and returns MarketDataDB.save_daily_data's counts.
+        max_rows (int): Row threshold for a flush.
+        max_seconds (float): Age threshold for a flush.
+        max_queue (int): Queue bound, in frames.
+        on_written (callable): Optional; called on the writer thread with each committed
+                               batch DataFrame (e.g. to checkpoint a job ledger).
+    """
+
+    def __init__(self, save, max_rows: int = INGEST_BATCH_ROWS, max_seconds: float = INGEST_FLUSH_SECONDS,
+                 max_queue: int = INGEST_QUEUE_FRAMES, on_written=None):
+        self.save = save
+        self.on_written = on_written
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self.batches = 0
+        self.counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        self.changed_symbols = []
+        self.written_symbols = set()
+        self.failures = {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def put(self, df: pd.DataFrame):
+        """Queues one frame for writing; blocks while the queue is full."""
+        if df is not None and not df.empty:
+            self._queue.put(df)
+
+    def close(self):
+        """Flushes whatever is pending and waits for the writer to finish."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        pending, pending_rows, oldest = [], 0, None
+        while True:
+            timeout = None if oldest is None else max(0.0, oldest + self.max_seconds - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                break
+            if item is not None:
+                pending.append(item)
+                pending_rows += len(item)
+                if oldest is None:
+                    oldest = time.monotonic()
+
+            if pending and (pending_rows >= self.max_rows or time.monotonic() - oldest >= self.max_seconds):
+                self._flush(pending)
+                pending, pending_rows, oldest = [], 0, None
+
+        if pending:
+            self._flush(pending)
+
+    def _flush(self, frames: list):
+        symbols = list(dict.fromkeys(s for f in frames for s in f['symbol'].unique()))
+        rows = sum(len(f) for f in frames)
+        try:
+            batch = pd.concat(frames, ignore_index=True)
+            counts = self.save(batch)
+        except Exception as e:
+            # Keep draining: the symbols are reported as failed so their watermarks stay put
+            print(f"[Pipeline] Failed to write batch of {rows} rows ({len(symbols)} symbols): {e}")
+            self.failures.update({s: str(e) for s in symbols})
+            return
+        self.batches += 1
+        for key in self.counts:
+            self.counts[key] += counts[key]
+        self.changed_symbols.extend(counts['changed_symbols'])
+        self.written_symbols.update(symbols)
+        if self.on_written is not None:
+            try:
+                self.on_written(batch)
+            except Exception as e:
+                print(f"[Pipeline] on_written callback failed: {e}")
@@ -8,6 +8,7 @@ import pandas as pd
 import yfinance as yf
 import time
 from datetime import datetime, timedelta
+from universe_loader import load_universe, sheet_tickers
 
 
 def fetch_stock_data(ticker: str, industry: str, period_months: int = 2) -> pd.DataFrame:
@@ -65,22 +66,14 @@ def read_excel_tickers(excel_path: str) -> dict:
     industry_tickers = {}
     
     try:
-        # 讀取所有 Sheet 名稱
-        xlsx = pd.ExcelFile(excel_path)
-        sheet_names = xlsx.sheet_names
+        # 一次解析所有 Sheet，並快取於 .cache/ (Excel 未變更時不需重新解析)
+        universe = sheet_tickers(load_universe(excel_path))
         
-        print(f"[INFO] Found {len(sheet_names)} industry sheets")
+        print(f"[INFO] Found {len(universe)} industry sheets")
         
-        for sheet_name in sheet_names:
-            df = pd.read_excel(xlsx, sheet_name=sheet_name)
-            
-            # 檢查是否有 Ticker 欄位
-            if 'Ticker' in df.columns:
-                tickers = df['Ticker'].dropna().unique().tolist()
-                industry_tickers[sheet_name] = tickers
-                print(f"  - {sheet_name}: {len(tickers)} stocks")
-            else:
-                print(f"  - {sheet_name}: 'Ticker' column not found")
+        for sheet_name, (_, tickers) in universe.items():
+            industry_tickers[sheet_name] = tickers
+            print(f"  - {sheet_name}: {len(tickers)} stocks")
                 
     except Exception as e:
         print(f"[ERROR] Cannot read Excel file: {str(e)}")
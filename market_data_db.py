@@ -1,10 +1,13 @@
+import io
 import os
 import pandas as pd
-from sqlalchemy import create_engine, MetaData, Table, Column, String, Date, Float, BigInteger, DateTime, Integer, ForeignKey, select, text
+from sqlalchemy import create_engine, MetaData, Table, Column, String, Date, Float, BigInteger, DateTime, Integer, ForeignKey, Index, select, text, tuple_, literal_column
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.sql import func
 from dotenv import load_dotenv
 from typing import Optional
+from performance_snapshot import compute_performance, LOOKBACK_DAYS
+from returns_engine import returns_sql, DEFAULT_HORIZONS
 
 # Load environment variables
 load_dotenv()
@@ -15,6 +18,15 @@ class MarketDataDB:
     Features strict schema definition and high-performance UPSERT operations.
     """
 
+    # Fundamentals accepted by register_ticker(s) (dividend_yield intentionally excluded)
+    TICKER_INFO_COLUMNS = ('company_name', 'market_cap', 'revenue', 'gross_profit',
+                           'net_income', 'pe_ratio', 'profit_margin')
+
+    # save_daily_data switches from INSERT ... VALUES to COPY + merge at this many rows
+    BULK_UPSERT_THRESHOLD = 5000
+    # Rows streamed per COPY chunk (bounds the in-memory CSV buffer)
+    BULK_CHUNK_ROWS = 250_000
+
     def __init__(self):
         """
         Initializes the database engine using environment variables.
@@ -32,14 +44,9 @@ class MarketDataDB:
         # url = f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{dbname}"
         db_url = f"postgresql+psycopg2://{config['DB_USER']}:{config['DB_PASSWORD']}@{config['DB_HOST']}:{config['DB_PORT']}/{config['DB_NAME']}?sslmode=require"
         
-        # Create Engine
-        # pool_size=10, max_overflow=20 for handling concurrent writes if needed
-        self.engine = create_engine(
-            db_url, 
-            pool_size=10, 
-            max_overflow=20,
-            pool_pre_ping=True # Auto-reconnect if connection drops
-        )
+        # Engine is created on first use (see `engine`); constructing MarketDataDB does no I/O
+        self._db_url = db_url
+        self._engine = None
         
         # Schema Definition (Core)
         self.metadata = MetaData()
@@ -67,7 +74,8 @@ class MarketDataDB:
             Column('pe_ratio', Float),
             Column('profit_margin', Float),
             Column('dividend_yield', Float),
-            Column('created_at', DateTime, server_default=func.now())
+            Column('created_at', DateTime, server_default=func.now()),
+            Column('updated_at', DateTime, server_default=func.now(), onupdate=func.now())
         )
 
         # 3. Daily Prices Table
@@ -79,23 +87,87 @@ class MarketDataDB:
             Column('close', Float),
             Column('adj_close', Float),
             Column('volume', BigInteger),
+            Column('updated_at', DateTime, server_default=func.now(), onupdate=func.now()),
+            Index('ix_us_daily_prices_updated_at', 'updated_at') # Cheap MAX(updated_at) for data versioning
+        )
+
+        # 4. Performance Snapshot Table (derived from prices, refreshed at ingest time)
+        self.performance_table = Table(
+            'ticker_performance',
+            self.metadata,
+            Column('symbol', String(20), ForeignKey('tickers.ticker'), primary_key=True),
+            Column('as_of_date', Date),
+            Column('price', Float),
+            Column('volume', BigInteger),
+            Column('change_1d', Float),
+            Column('change_1m', Float),
+            Column('change_2m', Float),
+            Column('change_3m', Float),
+            Column('change_6m', Float),
+            Column('change_12m', Float),
+            Column('change_ytd', Float),
             Column('updated_at', DateTime, server_default=func.now(), onupdate=func.now())
         )
         
-        # Ensure table exists
-        self.metadata.create_all(self.engine)
+        # 5. Ingestion Watermarks (per-ticker progress of the price ingest)
+        self.watermarks_table = Table(
+            'ticker_watermarks',
+            self.metadata,
+            Column('symbol', String(20), ForeignKey('tickers.ticker'), primary_key=True),
+            Column('last_date', Date),              # Latest price date stored
+            Column('last_success_at', DateTime),    # Last fetch that stored rows
+            Column('last_attempt_at', DateTime),
+            Column('failure_count', Integer, nullable=False, server_default='0'), # Consecutive failures
+            Column('last_error', String(500))
+        )
 
-        # --- Migration: Ensure columns exist ---
-        with self.engine.begin() as conn:
-            conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS market_cap BIGINT"))
-            conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS revenue BIGINT"))
-            conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS gross_profit BIGINT"))
-            conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS net_income BIGINT"))
-            conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS pe_ratio FLOAT"))
-            conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS profit_margin FLOAT"))
-            conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS dividend_yield FLOAT"))
+        # 6. Ingest Job Ledger (per-run, per-ticker progress; see ingest_ledger.py)
+        self.ingest_jobs_table = Table(
+            'ingest_jobs',
+            self.metadata,
+            Column('id', Integer, primary_key=True),
+            Column('kind', String(32), nullable=False),      # 'daily_update', 'batch_run', ...
+            Column('job_key', String(255), nullable=False),  # Identifies reruns of the same job
+            Column('status', String(16), nullable=False, server_default='running'),
+            Column('total_items', Integer),
+            Column('started_at', DateTime, server_default=func.now()),
+            Column('finished_at', DateTime),
+            Index('ix_ingest_jobs_kind_key', 'kind', 'job_key')
+        )
 
-        print("[DB] Initialized MarketDataDB and verified schema (Industries -> Tickers -> Prices).")
+        self.ingest_job_items_table = Table(
+            'ingest_job_items',
+            self.metadata,
+            Column('job_id', Integer, ForeignKey('ingest_jobs.id', ondelete='CASCADE'), primary_key=True),
+            Column('item', String(64), primary_key=True),    # Ticker
+            Column('status', String(16), nullable=False, server_default='pending'),
+            Column('attempts', Integer, nullable=False, server_default='0'),
+            Column('started_at', DateTime),                  # Fetch started
+            Column('fetched_at', DateTime),                  # Fetch returned rows
+            Column('finished_at', DateTime),                 # Rows committed (or item failed/skipped)
+            Column('rows', Integer),
+            Column('error', String(500))
+        )
+
+        # Schema changes live in migrations.py (run `python migrations.py` once per deploy)
+
+    @property
+    def engine(self):
+        """SQLAlchemy engine, created lazily so scripts that never query do not connect."""
+        if self._engine is None:
+            # pool_size=10, max_overflow=20 for handling concurrent writes if needed
+            self._engine = create_engine(
+                self._db_url,
+                pool_size=10,
+                max_overflow=20,
+                pool_pre_ping=True # Auto-reconnect if connection drops
+            )
+        return self._engine
+
+    def migrate(self) -> int:
+        """Applies pending schema migrations (see migrations.py). Returns the number of steps applied."""
+        from migrations import run_migrations
+        return run_migrations(self)
 
     def get_or_create_industry(self, name: str) -> int:
         """
@@ -120,49 +192,83 @@ class MarketDataDB:
         Registers a ticker under an industry if it doesn't already exist.
         Updates market_cap and fundamentals if info is provided.
         """
-        values = {
-            'ticker': ticker, 
-            'industry_id': industry_id
-        }
-        
-        # Mapping: DB Column -> Info Key
-        # info keys assumed: 'market_cap', 'revenue', 'gross_profit', etc.
-        if info:
-            if 'company_name' in info: values['company_name'] = info['company_name']
-            if 'market_cap' in info: values['market_cap'] = info['market_cap']
-            if 'revenue' in info: values['revenue'] = info['revenue']
-            if 'gross_profit' in info: values['gross_profit'] = info['gross_profit']
-            if 'net_income' in info: values['net_income'] = info['net_income']
-            if 'pe_ratio' in info: values['pe_ratio'] = info['pe_ratio']
-            if 'profit_margin' in info: values['profit_margin'] = info['profit_margin']
-            # if 'dividend_yield' in info: values['dividend_yield'] = info['dividend_yield']
-
-        stmt = insert(self.tickers_table).values(**values).on_conflict_do_update(
-            index_elements=['ticker'],
-            set_=values # Update all fields on conflict
-        )
-        
+        self._upsert_tickers([{'ticker': ticker, 'industry_id': industry_id, **(info or {})}])
+
+    def register_tickers(self, records: list) -> int:
+        """
+        Registers many tickers in one round trip per distinct set of provided fields.
+
+        Args:
+            records (list): Dicts with 'ticker', 'industry_id' and any of TICKER_INFO_COLUMNS
+                            (extra keys such as 'currency' are ignored). As in register_ticker,
+                            only the provided fields are written.
+
+        Returns:
+            int: Rows inserted or changed (rows whose values are unchanged are skipped).
+        """
+        changed = self._upsert_tickers(records)
+        print(f"[DB] Registered {len(records)} tickers ({changed} new or changed).")
+        return changed
+
+    def _upsert_tickers(self, records: list) -> int:
+        # Last record wins for repeated tickers (ON CONFLICT cannot update a row twice)
+        latest = {}
+        for record in records:
+            values = {'ticker': record['ticker'], 'industry_id': record['industry_id']}
+            # Mapping: DB Column -> Info Key (same names)
+            values.update({col: record[col] for col in self.TICKER_INFO_COLUMNS if col in record})
+            latest[values['ticker']] = values
+
+        # Rows providing the same fields share one multi-row statement
+        groups = {}
+        for values in latest.values():
+            groups.setdefault(tuple(values), []).append(values)
+
+        changed = 0
         with self.engine.begin() as conn:
-            conn.execute(stmt)
+            for columns, rows in groups.items():
+                stmt = insert(self.tickers_table).values(rows)
+                update_cols = [c for c in columns if c != 'ticker']
+                # Skip the write (and the updated_at bump) when nothing differs
+                is_changed = tuple_(*[self.tickers_table.c[c] for c in update_cols]).is_distinct_from(
+                    tuple_(*[stmt.excluded[c] for c in update_cols]))
+                upsert_stmt = stmt.on_conflict_do_update(
+                    index_elements=['ticker'],
+                    set_={**{c: stmt.excluded[c] for c in update_cols}, 'updated_at': func.now()},
+                    where=is_changed
+                )
+                changed += conn.execute(upsert_stmt).rowcount
+        return changed
 
-    def save_daily_data(self, df: pd.DataFrame):
+    def save_daily_data(self, df: pd.DataFrame, bulk: Optional[bool] = None):
         """
         Efficiently UPSERTS (Insert on Conflict Update) a DataFrame into the database.
         
         Args:
             df (pd.DataFrame): Must contain Index(Date) or 'date' column, 
                                and columns ['symbol', 'close', 'adj_close', 'volume'].
+            bulk (bool): Force (True) or skip (False) the COPY path. By default it is
+                         used for frames of BULK_UPSERT_THRESHOLD rows or more.
+
+        Returns:
+            dict: {'inserted', 'updated', 'unchanged'} row counts plus 'changed_symbols'
+                  (symbols with at least one inserted/updated row). Existing rows whose
+                  close/adj_close/volume are identical are not rewritten, so `updated_at`
+                  only moves when a price actually changed.
         """
         if df.empty:
             print("[DB] Warning: Empty DataFrame provided, skipping save.")
-            return
+            return {'inserted': 0, 'updated': 0, 'unchanged': 0, 'changed_symbols': []}
 
         # Prepare DataFrame
         data = df.copy()
         
         # Ensure 'date' is a column (reset index if needed)
         # Note: The fetcher returns index named 'market_date', we map it to 'date'
-        if data.index.name == 'market_date':
+        if 'market_date' in data.columns:
+            # Long multi-symbol frames (e.g. MarketDataFetcher.fetch_many)
+            data = data.rename(columns={'market_date': 'date'})
+        elif data.index.name == 'market_date':
             data = data.reset_index()
             data = data.rename(columns={'market_date': 'date'})
         elif 'date' not in data.columns and isinstance(data.index, pd.DatetimeIndex):
@@ -174,6 +280,11 @@ class MarketDataDB:
         if not required_cols.issubset(data.columns):
              raise ValueError(f"DataFrame missing required columns. Expected {required_cols}, got {data.columns}")
 
+        if bulk is None:
+            bulk = len(data) >= self.BULK_UPSERT_THRESHOLD
+        if bulk:
+            return self._bulk_upsert_prices(data)
+
         # Convert to list of dicts for SQLAlchemy
         records = data.to_dict(orient='records')
         
@@ -189,14 +300,260 @@ class MarketDataDB:
             'updated_at': func.now() # Update timestamp
         }
         
+        # Skip rows whose values are identical (no WAL, no index churn, no updated_at bump)
+        is_changed = tuple_(self.prices_table.c.close, self.prices_table.c.adj_close, self.prices_table.c.volume) \
+            .is_distinct_from(tuple_(stmt.excluded.close, stmt.excluded.adj_close, stmt.excluded.volume))
+
         upsert_stmt = stmt.on_conflict_do_update(
             index_elements=['symbol', 'date'], # Constraint columns
-            set_=update_dict
-        )
+            set_=update_dict,
+            where=is_changed
+        ).returning(self.prices_table.c.symbol, literal_column('(xmax = 0)').label('inserted')) # xmax = 0 -> freshly inserted row
+
+        with self.engine.begin() as conn:
+            written = conn.execute(upsert_stmt).fetchall()
+            self._advance_watermarks(conn, data)
+
+        inserted = sum(row.inserted for row in written)
+        counts = {'inserted': inserted, 'updated': len(written) - inserted,
+                  'unchanged': len(records) - len(written),
+                  'changed_symbols': sorted({row.symbol for row in written})}
+        print(f"[DB] Successfully upserted {len(records)} rows "
+              f"({counts['inserted']} inserted, {counts['updated']} updated, {counts['unchanged']} unchanged).")
+        return counts
+
+    def _bulk_upsert_prices(self, data: pd.DataFrame) -> dict:
+        """
+        Large-batch path for save_daily_data: streams the frame through COPY into a
+        temporary staging table, then merges it with one INSERT ... SELECT ... ON CONFLICT
+        per chunk. Runs in a single transaction. Returns the same counts as save_daily_data.
+        """
+        frame = pd.DataFrame({
+            'symbol': data['symbol'].astype(str),
+            'date': pd.to_datetime(data['date']).dt.strftime('%Y-%m-%d'),
+            'close': pd.to_numeric(data['close'], errors='coerce'),
+            'adj_close': pd.to_numeric(data['adj_close'], errors='coerce'),
+            'volume': pd.to_numeric(data['volume'], errors='coerce').round().astype('Int64'),
+        })
+
+        # seq keeps the last occurrence when a frame repeats (symbol, date);
+        # ON CONFLICT cannot touch the same row twice in one statement.
+        # Unchanged rows are skipped by the WHERE; xmax = 0 marks freshly inserted rows.
+        merge_sql = """
+            WITH staged AS (
+                SELECT DISTINCT ON (symbol, date) symbol, date, close, adj_close, volume
+                FROM staging_prices
+                ORDER BY symbol, date, seq DESC
+            ), written AS (
+                INSERT INTO us_daily_prices (symbol, date, close, adj_close, volume, updated_at)
+                SELECT symbol, date, close, adj_close, volume, now() FROM staged
+                ON CONFLICT (symbol, date) DO UPDATE SET
+                    close = EXCLUDED.close,
+                    adj_close = EXCLUDED.adj_close,
+                    volume = EXCLUDED.volume,
+                    updated_at = now()
+                WHERE (us_daily_prices.close, us_daily_prices.adj_close, us_daily_prices.volume)
+                      IS DISTINCT FROM (EXCLUDED.close, EXCLUDED.adj_close, EXCLUDED.volume)
+                RETURNING symbol, (xmax = 0) AS inserted
+            )
+            SELECT (SELECT count(*) FROM staged),
+                   count(*) FILTER (WHERE inserted),
+                   count(*) FILTER (WHERE NOT inserted),
+                   array_agg(DISTINCT symbol)
+            FROM written
+        """
+
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        changed_symbols = set()
+        staged_rows = 0
+        chunks = 0
+        with self.engine.begin() as conn:
+            with conn.connection.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TEMP TABLE staging_prices (
+                        seq BIGSERIAL, symbol VARCHAR(20), date DATE,
+                        close DOUBLE PRECISION, adj_close DOUBLE PRECISION, volume BIGINT
+                    ) ON COMMIT DROP
+                """)
+                for start in range(0, len(frame), self.BULK_CHUNK_ROWS):
+                    buffer = io.StringIO()
+                    frame.iloc[start:start + self.BULK_CHUNK_ROWS].to_csv(buffer, index=False, header=False)
+                    buffer.seek(0)
+                    cursor.copy_expert(
+                        "COPY staging_prices (symbol, date, close, adj_close, volume) FROM STDIN WITH (FORMAT csv)",
+                        buffer
+                    )
+                    cursor.execute(merge_sql)
+                    staged, inserted, updated, symbols = cursor.fetchone()
+                    changed_symbols.update(symbols or [])
+                    cursor.execute(self.ADVANCE_WATERMARKS_SQL.format(source="""
+                        SELECT symbol, MAX(date) FROM staging_prices GROUP BY symbol
+                    """))
+                    staged_rows += staged
+                    counts['inserted'] += inserted
+                    counts['updated'] += updated
+                    counts['unchanged'] += staged - inserted - updated
+                    cursor.execute("TRUNCATE staging_prices")
+                    chunks += 1
+
+        print(f"[DB] Successfully upserted {staged_rows} rows (bulk COPY, {chunks} chunks): "
+              f"{counts['inserted']} inserted, {counts['updated']} updated, {counts['unchanged']} unchanged.")
+        counts['changed_symbols'] = sorted(changed_symbols)
+        return counts
+
+    # Moves watermarks forward (never back) and clears the failure streak.
+    # {source} yields (symbol, last_date) rows.
+    ADVANCE_WATERMARKS_SQL = """
+        INSERT INTO ticker_watermarks (symbol, last_date, last_success_at, last_attempt_at, failure_count, last_error)
+        SELECT src.*, now(), now(), 0, NULL FROM ({source}) AS src
+        ON CONFLICT (symbol) DO UPDATE SET
+            last_date = GREATEST(ticker_watermarks.last_date, EXCLUDED.last_date),
+            last_success_at = now(),
+            last_attempt_at = now(),
+            failure_count = 0,
+            last_error = NULL
+    """
 
+    def _advance_watermarks(self, conn, data: pd.DataFrame):
+        latest = pd.to_datetime(data['date']).groupby(data['symbol']).max()
+        rows = [{"s": symbol, "d": day.date()} for symbol, day in latest.items()]
+        source = "SELECT CAST(:s AS VARCHAR(20)) AS symbol, CAST(:d AS DATE) AS last_date"
+        conn.execute(text(self.ADVANCE_WATERMARKS_SQL.format(source=source)), rows)
+
+    def record_fetch_failures(self, failures: dict):
+        """
+        Records failed fetches so they show up in `ticker_watermarks`.
+        Watermarks are left untouched, so the next run re-requests the same range;
+        failure_count drives the retry backoff in daily_update.
+
+        Args:
+            failures (dict): {symbol: error message}
+        """
+        if not failures:
+            return
+        rows = [{"symbol": symbol, "error": str(error)[:500]} for symbol, error in failures.items()]
+        stmt = text("""
+            INSERT INTO ticker_watermarks (symbol, last_attempt_at, failure_count, last_error)
+            VALUES (:symbol, now(), 1, :error)
+            ON CONFLICT (symbol) DO UPDATE SET
+                last_attempt_at = now(),
+                failure_count = ticker_watermarks.failure_count + 1,
+                last_error = EXCLUDED.last_error
+        """)
         with self.engine.begin() as conn:
-            result = conn.execute(upsert_stmt)
-            print(f"[DB] Successfully upserted {result.rowcount} rows.")
+            conn.execute(stmt, rows)
+
+    def get_watermarks(self) -> pd.DataFrame:
+        """
+        Returns one row per registered ticker with its ingestion watermark.
+
+        Returns:
+            pd.DataFrame: Columns [ticker, last_date, last_success_at, failure_count,
+                          days_since_attempt]; last_date is None for tickers that were
+                          never ingested, days_since_attempt None if never attempted.
+        """
+        query = text("""
+            SELECT t.ticker, w.last_date, w.last_success_at, COALESCE(w.failure_count, 0) AS failure_count,
+                   EXTRACT(EPOCH FROM now()::timestamp - w.last_attempt_at) / 86400.0 AS days_since_attempt
+            FROM tickers t
+            LEFT JOIN ticker_watermarks w ON w.symbol = t.ticker
+            ORDER BY t.ticker
+        """)
+        with self.engine.connect() as conn:
+            return pd.read_sql(query, conn)
+
+    def refresh_ticker_performance(self, symbols: list = None, chunk_size: int = 500) -> int:
+        """
+        Recomputes the `ticker_performance` snapshot from `us_daily_prices`.
+        Call after prices are upserted so the API can read one row per ticker.
+
+        Args:
+            symbols (list): Tickers to refresh. Defaults to every registered ticker.
+            chunk_size (int): Tickers per price query, bounds memory on full refreshes.
+
+        Returns:
+            int: Number of snapshot rows written.
+        """
+        if symbols is None:
+            with self.engine.connect() as conn:
+                symbols = [r[0] for r in conn.execute(text("SELECT ticker FROM tickers ORDER BY ticker")).fetchall()]
+
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return 0
+
+        p_query = text(f"""
+            SELECT symbol as ticker, date as market_date, close as close_price, volume
+            FROM us_daily_prices WHERE symbol IN :tickers
+            AND date >= CURRENT_DATE - INTERVAL '{LOOKBACK_DAYS} days'
+            ORDER BY market_date ASC
+        """)
+
+        written = 0
+        for i in range(0, len(symbols), chunk_size):
+            chunk = symbols[i:i + chunk_size]
+            with self.engine.connect() as conn:
+                prices_df = pd.read_sql(p_query, conn, params={"tickers": tuple(chunk)})
+
+            snapshot = compute_performance(prices_df)
+            if snapshot.empty:
+                continue
+
+            snapshot = snapshot.rename(columns={'ticker': 'symbol'})
+            snapshot['volume'] = snapshot['volume'].fillna(0).astype('int64')
+            # NaN -> None so missing horizons are stored as NULL
+            records = snapshot.astype(object).where(snapshot.notna(), None).to_dict(orient='records')
+
+            stmt = insert(self.performance_table).values(records)
+            update_dict = {c: stmt.excluded[c] for c in snapshot.columns if c != 'symbol'}
+            update_dict['updated_at'] = func.now()
+            upsert_stmt = stmt.on_conflict_do_update(index_elements=['symbol'], set_=update_dict)
+
+            with self.engine.begin() as conn:
+                conn.execute(upsert_stmt)
+            written += len(records)
+
+        print(f"[DB] Refreshed performance snapshot for {written} tickers.")
+        return written
+
+    def get_industry_returns(self, industry_id: int, horizons=DEFAULT_HORIZONS,
+                             missing_snapshot_only: bool = False) -> pd.DataFrame:
+        """
+        Computes returns inside Postgres for every ticker of an industry.
+        Transfers one row per ticker rather than its price history.
+
+        Args:
+            industry_id (int): Industry to compute.
+            horizons: Horizon strings (see returns_engine.parse_horizon).
+            missing_snapshot_only (bool): Only tickers without a `ticker_performance` row.
+
+        Returns:
+            pd.DataFrame: Same columns as returns_engine.compute_returns (ticker_col='ticker', extra_cols=['volume']).
+        """
+        where = "t.industry_id = :iid"
+        if missing_snapshot_only:
+            where += " AND NOT EXISTS (SELECT 1 FROM ticker_performance tp WHERE tp.symbol = t.ticker)"
+
+        with self.engine.connect() as conn:
+            df = pd.read_sql(text(returns_sql(horizons, where)), conn, params={"iid": industry_id})
+        df['as_of_date'] = pd.to_datetime(df['as_of_date'])
+        return df
+
+    def get_data_version(self):
+        """
+        Returns a marker that changes whenever prices, tickers or the performance
+        snapshot are written (the latest `updated_at` across those tables).
+        Used to key API response caches.
+        """
+        query = text("""
+            SELECT GREATEST(
+                (SELECT MAX(updated_at) FROM us_daily_prices),
+                (SELECT MAX(updated_at) FROM tickers),
+                (SELECT MAX(updated_at) FROM ticker_performance)
+            )
+        """)
+        with self.engine.connect() as conn:
+            return conn.execute(query).scalar()
 
     def get_data(self, symbol: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
         """
@@ -225,6 +582,27 @@ class MarketDataDB:
             
         return df
 
+    def get_data_many(self, symbols: list, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        Retrieves market data for several symbols in one query.
+
+        Returns:
+            pd.DataFrame: Columns [symbol, date, close, adj_close, volume], sorted by symbol, date
+        """
+        cols = [self.prices_table.c.symbol, self.prices_table.c.date, self.prices_table.c.close,
+                self.prices_table.c.adj_close, self.prices_table.c.volume]
+        query = select(*cols).where(self.prices_table.c.symbol.in_(list(symbols)))
+
+        if start_date:
+            query = query.where(self.prices_table.c.date >= start_date)
+        if end_date:
+            query = query.where(self.prices_table.c.date <= end_date)
+
+        query = query.order_by(self.prices_table.c.symbol.asc(), self.prices_table.c.date.asc())
+
+        with self.engine.connect() as conn:
+            return pd.read_sql(query, conn)
+
 if __name__ == "__main__":
     # --- Test Routine ---
     print("--- Testing MarketDataDB ---")
@@ -1,14 +1,28 @@
-from typing import Optional
+from typing import Dict, Optional, Tuple
 import pandas as pd
+import re
+import threading
+import time
 import yfinance as yf
 import numpy as np
 
+# fetch_many failure reason when Yahoo confirms it has no bars for a symbol in the window
+# (delisted, not yet listed). Other failures carry yfinance's error and are worth retrying.
+NO_DATA = "No data returned"
+# yfinance errors meaning "no bars" rather than a failed request. "No timezone found" is
+# left out on purpose: Yahoo returns it for throttled requests as well.
+NO_DATA_PATTERN = re.compile(r"no price data found|no data found|data doesn't exist", re.IGNORECASE)
+
 class MarketDataFetcher:
     """
     負責從外部數據源（目前為 Yahoo Finance）獲取金融市場數據的模組。
     設計目標為提供標準化、清洗過的數據，以供下游資料庫儲存與分析使用。
     """
 
+    # yf.download keeps each call's results and errors in module globals (yf.shared),
+    # so concurrent multi-ticker downloads would overwrite each other's
+    _download_lock = threading.Lock()
+
     def fetch_us_daily_close(self, symbol: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
         """
         抓取指定美股代碼的每日收盤與成交量數據。
@@ -36,16 +50,17 @@ class MarketDataFetcher:
             # Handle special tickers (e.g. BRK.B -> BRK-B)
             fetch_symbol = symbol.replace('.', '-')
             
-            # 1. 下載數據
-            df = yf.download(
-                fetch_symbol, 
-                start=start_date, 
-                end=end_date, 
-                interval='1d', 
-                auto_adjust=False, 
-                progress=False,
-                multi_level_index=False 
-            )
+            # 1. 下載數據 (serialized: yf.download shares module-global state across threads)
+            with self._download_lock:
+                df = yf.download(
+                    fetch_symbol, 
+                    start=start_date, 
+                    end=end_date, 
+                    interval='1d', 
+                    auto_adjust=False, 
+                    progress=False,
+                    multi_level_index=False 
+                )
 
             # 2. 驗證數據
             if df.empty:
@@ -81,6 +96,113 @@ class MarketDataFetcher:
             print(f"[Fetcher] Error fetching {symbol}: {e}")
             return None
 
+    def fetch_many(self, symbols: list, start_date: str, end_date: str,
+                   batch_size: int = 100, pause: float = 1.0) -> Tuple[pd.DataFrame, Dict[str, str]]:
+        """
+        批次抓取多檔美股的每日收盤與成交量 (yfinance multi-ticker 模式)。
+        每批一次 yf.download 呼叫，取代逐檔呼叫 fetch_us_daily_close；
+        yfinance 內部仍是每檔一次 HTTP 請求 (threads=True 時並行)，限速時請以代碼數計算。
+
+        Args:
+            symbols (list): 股票代碼清單
+            start_date (str): 開始日期 YYYY-MM-DD
+            end_date (str): 結束日期 YYYY-MM-DD (yfinance: 不含當日)
+            batch_size (int): 每批代碼數量
+            pause (float): 批次之間的等待秒數 (rate limiting)
+
+        Returns:
+            Tuple[pd.DataFrame, Dict[str, str]]:
+                - Long format DataFrame: ['symbol', 'market_date', 'close', 'adj_close', 'volume']
+                  (可直接傳入 MarketDataDB.save_daily_data)
+                - failures: {symbol: 錯誤訊息}，無數據 (NO_DATA) 或下載失敗 (yfinance 錯誤) 的代碼
+        """
+        symbols = list(dict.fromkeys(symbols))
+        frames = []
+        failures = {}
+        batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+
+        for n, batch in enumerate(batches, start=1):
+            # Handle special tickers (e.g. BRK.B -> BRK-B)
+            fetch_map = {s.replace('.', '-'): s for s in batch}
+            print(f"[Fetcher] Batch {n}/{len(batches)}: downloading {len(batch)} symbols "
+                  f"from {start_date} to {end_date}...")
+
+            try:
+                with self._download_lock:
+                    raw = yf.download(
+                        list(fetch_map),
+                        start=start_date,
+                        end=end_date,
+                        interval='1d',
+                        auto_adjust=False,
+                        progress=False,
+                        group_by='column',
+                        threads=True
+                    )
+                    # Per-ticker errors (rate limits, timeouts...) are swallowed into NaN columns
+                    errors = dict(getattr(getattr(yf, 'shared', None), '_ERRORS', None) or {})
+            except Exception as e:
+                print(f"[Fetcher] Error fetching batch {n}: {e}")
+                failures.update({s: str(e) for s in batch})
+                continue
+
+            long_df = self._to_long_format(raw, fetch_map)
+            fetched = set(long_df['symbol']) if not long_df.empty else set()
+            for key, s in fetch_map.items():
+                if s not in fetched:
+                    failures[s] = self._classify_missing(errors.get(key.upper()))
+            if not long_df.empty:
+                frames.append(long_df)
+
+            if pause and n < len(batches):
+                time.sleep(pause)
+
+        columns = ['symbol', 'market_date', 'close', 'adj_close', 'volume']
+        result = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        print(f"[Fetcher] Fetched {len(result)} rows for {len(symbols) - len(failures)}/{len(symbols)} symbols.")
+        return result, failures
+
+    @staticmethod
+    def _classify_missing(error: Optional[str]) -> str:
+        """NO_DATA for a confirmed empty window, else the (retryable) download error."""
+        if error is None:
+            return "No data and no error reported by yfinance"
+        if NO_DATA_PATTERN.search(error):
+            return NO_DATA
+        return error
+
+    @staticmethod
+    def _to_long_format(raw: pd.DataFrame, fetch_map: dict) -> pd.DataFrame:
+        """Wide yfinance result (field x ticker columns) -> long rows with a non-null close."""
+        columns = ['symbol', 'market_date', 'close', 'adj_close', 'volume']
+        if raw is None or raw.empty:
+            return pd.DataFrame(columns=columns)
+
+        if not isinstance(raw.columns, pd.MultiIndex):
+            # Single-ticker download without a ticker level
+            raw.columns = pd.MultiIndex.from_product([raw.columns, [next(iter(fetch_map))]])
+        if not {'Close', 'Adj Close', 'Volume'}.issubset(raw.columns.get_level_values(0)):
+            return pd.DataFrame(columns=columns)
+
+        closes = raw['Close']
+        tickers = closes.columns
+        adj = raw['Adj Close'].reindex(columns=tickers)
+        volume = raw['Volume'].reindex(columns=tickers)
+
+        # 時區處理 (標準化 UTC+0)
+        dates = raw.index.tz_localize(None) if raw.index.tz is not None else raw.index
+
+        long_df = pd.DataFrame({
+            'symbol': np.tile([fetch_map.get(t, t) for t in tickers], len(dates)),
+            'market_date': np.repeat(dates.values, len(tickers)),
+            'close': closes.to_numpy(dtype='float64').ravel(),
+            'adj_close': adj.to_numpy(dtype='float64').ravel(),
+            'volume': volume.to_numpy(dtype='float64').ravel(),
+        })
+        long_df = long_df[long_df['close'].notna()]
+        long_df['volume'] = long_df['volume'].fillna(0).astype('int64')
+        return long_df.sort_values(['symbol', 'market_date'], ignore_index=True)
+
     def get_ticker_info(self, symbol: str) -> dict:
         """
         Fetches fundamentals for a ticker (Market Cap, Revenue, PE, etc.)
@@ -0,0 +1,139 @@
+"""
+Versioned schema migrations for the market data database.
+
+Run once per deploy (Render preDeployCommand / CI) rather than on every
+MarketDataDB() construction:
+
+    python migrations.py            # apply pending steps
+    python migrations.py --status   # show applied / pending steps
+
+Applied versions are recorded in `schema_version`; each step runs in its own
+transaction together with its version row, so a failed step can be retried.
+Steps must stay idempotent (IF NOT EXISTS) because databases created before
+this runner existed replay them all once.
+"""
+import argparse
+from sqlalchemy import text
+
+# Arbitrary constant for pg_advisory_xact_lock: serializes concurrent deploys
+MIGRATION_LOCK_ID = 727274
+
+
+def _create_base_tables(conn, db):
+    db.metadata.create_all(conn, tables=[db.industries_table, db.tickers_table, db.prices_table])
+
+
+def _add_fundamental_columns(conn, db):
+    conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS market_cap BIGINT"))
+    conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS revenue BIGINT"))
+    conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS gross_profit BIGINT"))
+    conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS net_income BIGINT"))
+    conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS pe_ratio FLOAT"))
+    conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS profit_margin FLOAT"))
+    conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS dividend_yield FLOAT"))
+
+
+def _add_updated_at_tracking(conn, db):
+    conn.execute(text("ALTER TABLE tickers ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT now()"))
+    conn.execute(text("ALTER TABLE us_daily_prices ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT now()"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_us_daily_prices_updated_at ON us_daily_prices (updated_at)"))
+
+
+def _create_performance_snapshot(conn, db):
+    db.metadata.create_all(conn, tables=[db.performance_table])
+
+
+def _create_ticker_watermarks(conn, db):
+    db.metadata.create_all(conn, tables=[db.watermarks_table])
+    # Seed from the prices already stored so the first incremental run only fetches new days
+    conn.execute(text("""
+        INSERT INTO ticker_watermarks (symbol, last_date, last_success_at, failure_count)
+        SELECT p.symbol, MAX(p.date), MAX(p.updated_at), 0
+        FROM us_daily_prices p JOIN tickers t ON t.ticker = p.symbol
+        GROUP BY p.symbol
+        ON CONFLICT (symbol) DO NOTHING
+    """))
+
+
+def _create_ingest_ledger(conn, db):
+    db.metadata.create_all(conn, tables=[db.ingest_jobs_table, db.ingest_job_items_table])
+
+
+# (version, description, step). Append new steps; never edit or reorder applied ones.
+MIGRATIONS = [
+    (1, "Create industries, tickers and us_daily_prices", _create_base_tables),
+    (2, "Add fundamental columns to tickers", _add_fundamental_columns),
+    (3, "Track updated_at on tickers and prices", _add_updated_at_tracking),
+    (4, "Create ticker_performance snapshot", _create_performance_snapshot),
+    (5, "Create ticker_watermarks (seeded from us_daily_prices)", _create_ticker_watermarks),
+    (6, "Create ingest_jobs and ingest_job_items ledger", _create_ingest_ledger),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description VARCHAR(255),
+            applied_at TIMESTAMP DEFAULT now()
+        )
+    """))
+
+
+def applied_versions(engine) -> set:
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return {r[0] for r in conn.execute(text("SELECT version FROM schema_version")).fetchall()}
+
+
+def pending_migrations(engine) -> list:
+    applied = applied_versions(engine)
+    return [m for m in MIGRATIONS if m[0] not in applied]
+
+
+def run_migrations(db) -> int:
+    """
+    Applies every pending step in version order.
+
+    Args:
+        db (MarketDataDB): Provides the engine and table definitions.
+
+    Returns:
+        int: Number of steps applied.
+    """
+    engine = db.engine
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+
+    applied = 0
+    for version, description, step in MIGRATIONS:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            done = conn.execute(text("SELECT 1 FROM schema_version WHERE version = :v"), {"v": version}).first()
+            if done:
+                continue
+            print(f"[MIGRATE] Applying {version}: {description}...")
+            step(conn, db)
+            conn.execute(text("INSERT INTO schema_version (version, description) VALUES (:v, :d)"),
+                         {"v": version, "d": description})
+            applied += 1
+
+    print(f"[MIGRATE] Schema up to date (version {MIGRATIONS[-1][0]}, {applied} steps applied).")
+    return applied
+
+
+if __name__ == "__main__":
+    from market_data_db import MarketDataDB
+
+    parser = argparse.ArgumentParser(description="Apply database schema migrations.")
+    parser.add_argument("--status", action="store_true", help="List pending migrations without applying them")
+    args = parser.parse_args()
+
+    db = MarketDataDB()
+    if args.status:
+        pending = {m[0] for m in pending_migrations(db.engine)}
+        for version, description, _ in MIGRATIONS:
+            state = "pending" if version in pending else "applied"
+            print(f"  {version:>3}  {state:<8} {description}")
+    else:
+        db.migrate()
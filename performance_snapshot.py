@@ -0,0 +1,24 @@
+import pandas as pd
+from returns_engine import compute_returns, column_name, lookback_days, DEFAULT_HORIZONS
+
+# Calendar lookback needed to anchor the longest default horizon (12M) plus a holiday buffer
+LOOKBACK_DAYS = max(400, lookback_days(DEFAULT_HORIZONS))
+
+CHANGE_COLUMNS = [column_name(h) for h in DEFAULT_HORIZONS]
+
+
+def compute_performance(prices_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Computes the per-ticker performance snapshot from a long price frame.
+
+    Args:
+        prices_df (pd.DataFrame): Columns ['ticker', 'market_date', 'close_price', 'volume'].
+
+    Returns:
+        pd.DataFrame: One row per ticker with columns
+                      ['ticker', 'as_of_date', 'price', 'volume'] + CHANGE_COLUMNS.
+    """
+    result = compute_returns(prices_df, DEFAULT_HORIZONS, extra_cols=['volume'])
+    if not result.empty:
+        result['as_of_date'] = result['as_of_date'].dt.date
+    return result
@@ -0,0 +1,253 @@
+import numpy as np
+import pandas as pd
+from downsample import lttb, lttb_many
+
+# Supported `range` values for the history endpoints.
+# Month/day ranges mirror the tooltip's calendar slicing in index.html:
+# the series starts at the last close on or before (latest date - offset).
+RANGE_OFFSETS = {
+    '5D': pd.DateOffset(days=5),
+    '1M': pd.DateOffset(months=1),
+    '2M': pd.DateOffset(months=2),
+    '3M': pd.DateOffset(months=3),
+    '6M': pd.DateOffset(months=6),
+    '12M': pd.DateOffset(months=12),
+    '1Y': pd.DateOffset(years=1),
+    '2Y': pd.DateOffset(years=2),
+    '5Y': pd.DateOffset(years=5),
+}
+SPECIAL_RANGES = ('1D', 'YTD', 'MAX')
+VALID_RANGES = tuple(RANGE_OFFSETS) + SPECIAL_RANGES
+
+DEFAULT_MAX_POINTS = 1000
+
+# Response encodings for history series
+VALID_FORMATS = ('points', 'columnar')
+
+# Extra calendar days fetched before the nominal range start, so the anchor
+# close (last trading day on/before the target date) is always included.
+ANCHOR_BUFFER_DAYS = 10
+
+
+def normalize_range(range_key: str) -> str:
+    """Upper-cases and validates a range key. Raises ValueError for unknown ranges."""
+    key = (range_key or '').strip().upper()
+    if key not in VALID_RANGES:
+        raise ValueError(f"Unsupported range '{range_key}'. Expected one of {list(VALID_RANGES)}")
+    return key
+
+
+def range_start_date(range_key: str, today: pd.Timestamp = None):
+    """
+    Returns the earliest date that has to be read from the database for a range
+    (including the anchor buffer), or None for 'MAX'.
+    """
+    today = (today or pd.Timestamp.now()).normalize()
+    if range_key == 'MAX':
+        return None
+    if range_key == '1D':
+        start = today - pd.DateOffset(days=1)
+    elif range_key == 'YTD':
+        start = pd.Timestamp(year=today.year, month=1, day=1)
+    else:
+        start = today - RANGE_OFFSETS[range_key]
+    return (start - pd.Timedelta(days=ANCHOR_BUFFER_DAYS)).date()
+
+
+def slice_range(df: pd.DataFrame, range_key: str, date_col: str = 'market_date') -> pd.DataFrame:
+    """
+    Trims a single-symbol price frame (sorted by date) to the requested range,
+    measured from the symbol's own latest date.
+    """
+    if df.empty or range_key == 'MAX':
+        return df
+    if range_key == '1D':
+        return df.tail(2)
+
+    dates = df[date_col]
+    latest = dates.iloc[-1]
+    if range_key == 'YTD':
+        target = pd.Timestamp(year=latest.year, month=1, day=1)
+    else:
+        target = latest - RANGE_OFFSETS[range_key]
+
+    anchor = dates.searchsorted(target, side='right') - 1
+    if anchor < 0:
+        # Not enough history for the full range: return everything we have
+        return df
+    return df.iloc[anchor:]
+
+
+def epoch_days(dates) -> np.ndarray:
+    """Converts a date column/index to integer days since 1970-01-01 (the LTTB x axis)."""
+    return pd.DatetimeIndex(pd.to_datetime(dates)).values.astype('datetime64[D]').astype('int64')
+
+
+def downsample(df: pd.DataFrame, max_points: int, date_col: str = 'market_date',
+               price_col: str = 'close_price') -> pd.DataFrame:
+    """Reduces a series to at most max_points rows with LTTB, keeping the first and last rows."""
+    if max_points is None or len(df) <= max_points:
+        return df
+    df = df[df[price_col].notna()]
+    return df.iloc[lttb(epoch_days(df[date_col]), df[price_col].to_numpy(dtype='float64'), max_points)]
+
+
+def to_points(df: pd.DataFrame, date_col: str = 'market_date', price_col: str = 'close_price') -> list:
+    """Converts a price frame into ApexCharts-style [{"x": "YYYY-MM-DD", "y": close}] points."""
+    dates = pd.to_datetime(df[date_col]).dt.strftime('%Y-%m-%d').tolist()
+    closes = df[price_col].astype('float64')
+    values = closes.astype(object).where(closes.notna(), None).tolist()
+    return [{"x": x, "y": y} for x, y in zip(dates, values)]
+
+
+def build_history(df: pd.DataFrame, range_key: str, max_points: int = DEFAULT_MAX_POINTS,
+                  date_col: str = 'market_date', price_col: str = 'close_price') -> list:
+    """Slices, downsamples and serializes one symbol's price frame."""
+    df = slice_range(df.sort_values(date_col), range_key, date_col=date_col)
+    df = downsample(df, max_points, date_col=date_col, price_col=price_col)
+    return to_points(df, date_col=date_col, price_col=price_col)
+
+
+def _group_offsets(codes: np.ndarray):
+    """First and one-past-last row of each run of equal codes in a sorted code array."""
+    boundaries = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate([[0], boundaries]).astype('int64')
+    stops = np.concatenate([boundaries, [len(codes)]]).astype('int64')
+    return starts, stops
+
+
+def _range_offsets(codes: np.ndarray, days: np.ndarray, starts: np.ndarray, stops: np.ndarray,
+                   range_key: str) -> np.ndarray:
+    """
+    Vectorized slice_range: the row where each symbol's range begins, for a frame
+    sorted by (symbol, date). One searchsorted over a combined (code, day) key.
+    """
+    if range_key == 'MAX':
+        return starts
+    if range_key == '1D':
+        return np.maximum(starts, stops - 2)
+
+    latest = pd.DatetimeIndex(days[stops - 1].astype('datetime64[D]'))
+    if range_key == 'YTD':
+        target = epoch_days(pd.to_datetime(pd.DataFrame({'year': latest.year, 'month': 1, 'day': 1})))
+    else:
+        target = epoch_days(latest - RANGE_OFFSETS[range_key])
+
+    span = int(days.max() - min(days.min(), target.min())) + 2
+    base = min(days.min(), target.min())
+    keys = codes * span + (days - base)
+    group_codes = codes[starts]
+    anchor = np.searchsorted(keys, group_codes * span + (target - base), side='right') - 1
+    # Not enough history for the full range: keep everything we have
+    return np.where(anchor < starts, starts, anchor)
+
+
+def _sorted_series(df: pd.DataFrame, date_col: str, price_col: str, symbol_col: str, dropna: bool = True):
+    """Sorts once by (symbol, date), optionally dropping missing closes. Returns (df, symbols, codes, days, closes, starts, stops)."""
+    if dropna:
+        df = df[df[price_col].notna()]
+    df = df.assign(**{date_col: pd.to_datetime(df[date_col])}).sort_values([symbol_col, date_col], kind='mergesort')
+    codes, symbols = pd.factorize(df[symbol_col], sort=True)
+    codes = codes.astype('int64')
+    days = epoch_days(df[date_col])
+    closes = df[price_col].to_numpy(dtype='float64')
+    starts, stops = _group_offsets(codes)
+    return df, symbols, codes, days, closes, starts, stops
+
+
+def slice_ranges(df: pd.DataFrame, range_key: str, date_col: str = 'market_date',
+                 price_col: str = 'close_price', symbol_col: str = 'symbol') -> pd.DataFrame:
+    """Multi-symbol slice_range in one pass. Returns the sliced rows sorted by (symbol, date)."""
+    if df.empty:
+        return df
+    df, _, codes, days, _, starts, stops = _sorted_series(df, date_col, price_col, symbol_col, dropna=False)
+    first = _range_offsets(codes, days, starts, stops, range_key)
+    # Row i is kept when it lies at or after its group's range start
+    keep = np.arange(len(df)) >= np.repeat(first, stops - starts)
+    return df[keep]
+
+
+def build_histories(df: pd.DataFrame, range_key: str, max_points: int = DEFAULT_MAX_POINTS,
+                    symbols: list = None, date_col: str = 'market_date',
+                    price_col: str = 'close_price', symbol_col: str = 'symbol') -> dict:
+    """
+    Multi-symbol build_history. The frame is sorted once, split into per-symbol
+    slices at group offsets (no groupby/get_group per symbol), and all slices are
+    downsampled in one batched LTTB call. Returns {symbol: points}.
+    """
+    result = {s: [] for s in (symbols or [])}
+    if df.empty:
+        return result
+
+    _, names, codes, days, closes, starts, stops = _sorted_series(df, date_col, price_col, symbol_col)
+    if len(codes) == 0:
+        return result
+    firsts = _range_offsets(codes, days, starts, stops, range_key)
+
+    if max_points is not None:
+        indices = lttb_many([(days[a:b], closes[a:b]) for a, b in zip(firsts, stops)], max_points)
+        rows = np.concatenate([a + idx for a, idx in zip(firsts, indices)])
+        counts = np.array([len(idx) for idx in indices], dtype='int64')
+    else:
+        counts = stops - firsts
+        rows = np.concatenate([np.arange(a, b) for a, b in zip(firsts, stops)])
+
+    # Format every kept point at once, then cut the flat lists at per-symbol offsets
+    dates = np.datetime_as_string(days[rows].astype('datetime64[D]')).tolist()
+    values = closes[rows].tolist()
+    cuts = np.concatenate([[0], np.cumsum(counts)]).tolist()
+    for j, symbol in enumerate(names):
+        a, b = cuts[j], cuts[j + 1]
+        result[symbol] = [{"x": x, "y": y} for x, y in zip(dates[a:b], values[a:b])]
+    return result
+
+
+def encode_columnar(df: pd.DataFrame, symbols: list = None, max_points: int = None,
+                    date_col: str = 'market_date', price_col: str = 'close_price',
+                    symbol_col: str = 'symbol') -> dict:
+    """
+    Encodes many symbols' series against one shared date axis (format=columnar).
+
+    The axis is sent once as a base epoch day plus day deltas; each symbol gets the
+    axis index of its first close and a float array aligned to the axis (null where
+    the symbol has no close). Prices are rounded to 4 decimals, about float32
+    precision, which keeps the JSON short.
+
+        {"encoding": "columnar", "base_day": 19724, "day_deltas": [1, 1, 3, ...],
+         "series": {"AAL": {"start": 0, "values": [12.31, 12.5, null, ...]}}}
+    """
+    symbols = list(symbols) if symbols is not None else []
+    empty = {"encoding": "columnar", "base_day": None, "day_deltas": [],
+             "series": {s: {"start": 0, "values": []} for s in symbols}}
+    if df.empty:
+        return empty
+
+    wide = df.pivot(index=date_col, columns=symbol_col, values=price_col).sort_index()
+    matrix = wide.to_numpy(dtype='float64').round(4)
+    valid = ~np.isnan(matrix)
+    starts = valid.argmax(axis=0)
+
+    if max_points is not None and len(wide) > max_points:
+        # Thin the shared axis, keeping every symbol's first close
+        step = (len(wide) - 1) / (max_points - 1)
+        keep = np.unique(np.concatenate([np.round(np.arange(max_points) * step).astype('int64'), starts]))
+        wide, matrix, valid = wide.iloc[keep], matrix[keep], valid[keep]
+        starts = valid.argmax(axis=0)
+
+    days = epoch_days(wide.index)
+    series = dict(empty["series"])
+    for j, symbol in enumerate(wide.columns):
+        if not valid[:, j].any():
+            series[symbol] = {"start": 0, "values": []}
+            continue
+        start = int(starts[j])
+        end = len(days) - int(valid[::-1, j].argmax())
+        values = matrix[start:end, j]
+        series[symbol] = {"start": start, "values": np.where(np.isnan(values), None, values).tolist()}
+
+    return {
+        "encoding": "columnar",
+        "base_day": int(days[0]),
+        "day_deltas": np.diff(days).tolist(),
+        "series": series,
+    }
@@ -1,14 +1,15 @@
 from market_data_db import MarketDataDB
 from market_data_fetcher import MarketDataFetcher
+from fetch_scheduler import FetchScheduler
 from sqlalchemy import text
 import pandas as pd
-import time
 from datetime import datetime
 
 def repair_missing_data():
     print("Starting Repair Job for Missing Tickers...")
     db = MarketDataDB()
     fetcher = MarketDataFetcher()
+    scheduler = FetchScheduler()
     
     start_date = "2024-01-01"
     end_date = datetime.now().strftime("%Y-%m-%d")
@@ -31,35 +32,47 @@ def repair_missing_data():
     print(df_missing['ticker'].tolist())
     
     success_count = 0
-    
-    for i, row in df_missing.iterrows():
-        ticker = row['ticker']
-        ind_id = row['industry_id']
-        print(f"\n[{i+1}/{len(df_missing)}] Repairing: {ticker}")
+    repaired = []
+    ticker_records = []
+    industry_ids = dict(zip(df_missing['ticker'], df_missing['industry_id']))
+
+    # A. Fetch Prices (rate limited; downloads are serialized, results saved as each arrives)
+    price_results = scheduler.run(lambda t: fetcher.fetch_us_daily_close(t, start_date, end_date),
+                                  df_missing['ticker'].tolist())
+    for i, (ticker, df_prices, error) in enumerate(price_results, start=1):
+        print(f"\n[{i}/{len(df_missing)}] Repairing: {ticker}")
         
         try:
-            # A. Fetch Prices
-            df_prices = fetcher.fetch_us_daily_close(ticker, start_date, end_date)
-            
+            if error is not None:
+                raise error
+
             if df_prices is not None and not df_prices.empty:
                 # Store Prices
                 df_prices['symbol'] = ticker # DB expects 'symbol' column
                 db.save_daily_data(df_prices)
                 
-                # B. Fetch Info (Market Cap etc) since we're here
-                info = fetcher.get_ticker_info(ticker)
-                if info:
-                   db.register_ticker(ticker, ind_id, info) # Fixed Order: ticker str first
-                
                 print(f"   -> Success! ({len(df_prices)} records)")
                 success_count += 1
+                repaired.append(ticker)
             else:
                 print(f"   -> Failed: Still no data from source.")
-                
-            time.sleep(1) # Be gentle with API
             
         except Exception as e:
             print(f"   -> Error: {e}")
+    print(scheduler.summary())
+
+    # B. Fetch Info (Market Cap etc) for the repaired tickers and register in bulk
+    for ticker, info, error in scheduler.run(fetcher.get_ticker_info, repaired):
+        if info:
+            industry_id = industry_ids[ticker]
+            ticker_records.append({'ticker': ticker,
+                                   'industry_id': None if pd.isna(industry_id) else int(industry_id),
+                                   **info})
+    if ticker_records:
+        db.register_tickers(ticker_records)
+
+    if repaired:
+        db.refresh_ticker_performance(repaired)
 
     print(f"\nRepair Job Complete. Validated {success_count}/{len(df_missing)} tickers.")
 
@@ -0,0 +1,99 @@
+import threading
+from collections import OrderedDict
+
+
+class PayloadCache:
+    """
+    Bounded, thread-safe LRU cache of fully serialized API payloads.
+
+    Entries are keyed by an endpoint key (e.g. ("industry", 12)) and tagged with the
+    data version they were built from. A lookup with a different version is a miss,
+    and the first write under a newer version drops every stale entry at once. Writes
+    under an older version (a slow build finishing after a refresh) are ignored.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 128 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (version, body)
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, version):
+        """Returns the cached body for key if it was built from this data version, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, body: bytes):
+        """Stores a serialized body, evicting stale versions and least-recently-used entries."""
+        if len(body) > self.max_bytes:
+            return
+
+        with self._lock:
+            if version != self._version:
+                if self._is_older(version):
+                    return
+                self._clear()
+                self._version = version
+
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+
+            self._entries[key] = (version, body)
+            self._bytes += len(body)
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def has_room(self) -> bool:
+        """True while one more entry of average size fits without evicting anything."""
+        with self._lock:
+            count = len(self._entries)
+            if count >= self.max_entries:
+                return False
+            average = self._bytes / count if count else 0
+            return self._bytes + average <= self.max_bytes
+
+    def invalidate(self):
+        """Drops every entry (e.g. after an ingest run in the same process)."""
+        with self._lock:
+            self._clear()
+            self._version = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "version": str(self._version) if self._version is not None else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _is_older(self, version) -> bool:
+        if self._version is None or version is None:
+            return False
+        try:
+            return version < self._version
+        except TypeError:
+            # Versions that cannot be ordered: trust the newest write
+            return False
+
+    def _clear(self):
+        self.evictions += len(self._entries)
+        self._entries.clear()
+        self._bytes = 0
@@ -0,0 +1,227 @@
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from trading_calendar import COVERAGE, session_offset, sql_holiday_array
+
+# Horizon grammar: "<n><unit>" or "YTD"
+#   D = calendar days, W = weeks, M = calendar months, Y = years, T = NYSE sessions
+# Horizons anchor on the last close on or before (latest date - offset), where a
+# T offset counts exchange sessions (trading_calendar), not the ticker's own rows;
+# YTD anchors on the last close of the previous year (first close if listed this year).
+HORIZON_PATTERN = re.compile(r'^(\d+)([DWMYT])$')
+DEFAULT_HORIZONS = ('1D', '1M', '2M', '3M', '6M', '12M', 'YTD')
+
+# Sort key = ticker code * KEY_SPAN + (epoch day + DAY_OFFSET), so one searchsorted
+# over the whole frame finds anchors without crossing ticker boundaries.
+KEY_SPAN = 1 << 24
+DAY_OFFSET = 1 << 22
+
+
+def parse_horizon(horizon: str) -> tuple:
+    """
+    Parses a horizon string into (key, unit, n), e.g. "3m" -> ("3M", "M", 3).
+    Raises ValueError for malformed horizons.
+    """
+    key = (horizon or '').strip().upper()
+    if key == 'YTD':
+        return key, 'YTD', 0
+    match = HORIZON_PATTERN.match(key)
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid horizon '{horizon}'. Use e.g. 1D, 2W, 3M, 1Y, 10T or YTD")
+    return key, match.group(2), int(match.group(1))
+
+
+def parse_horizons(horizons) -> list:
+    """Parses a comma separated string or list of horizons into normalized keys (deduplicated, ordered)."""
+    if isinstance(horizons, str):
+        horizons = horizons.split(',')
+    keys = [parse_horizon(h)[0] for h in horizons if h and h.strip()]
+    if not keys:
+        raise ValueError("No horizons provided")
+    return list(dict.fromkeys(keys))
+
+
+def column_name(horizon: str) -> str:
+    """Output column for a horizon, e.g. "12M" -> "change_12m"."""
+    return f"change_{parse_horizon(horizon)[0].lower()}"
+
+
+def lookback_days(horizons) -> int:
+    """Calendar days of history needed to anchor every horizon (with a holiday buffer)."""
+    days = 0
+    for h in horizons:
+        _, unit, n = parse_horizon(h)
+        if unit == 'YTD':
+            span = 366
+        elif unit == 'D':
+            span = n
+        elif unit == 'W':
+            span = 7 * n
+        elif unit == 'M':
+            span = 31 * n
+        elif unit == 'Y':
+            span = 366 * n
+        else:  # Trading sessions
+            span = _session_span(n)
+        days = max(days, span)
+    return days + 14
+
+
+@lru_cache(maxsize=None)
+def _session_span(n: int) -> int:
+    """Calendar days back to the n-th session before any day: the widest such gap in the calendar."""
+    days = np.arange(np.datetime64(COVERAGE[0]), np.datetime64(COVERAGE[1]) + 1)
+    return int((days - session_offset(days, -n)).astype('int64').max())
+
+
+def _epoch_days(values) -> np.ndarray:
+    return pd.DatetimeIndex(pd.to_datetime(values)).values.astype('datetime64[D]').astype('int64')
+
+
+def _target_days(latest_dates: pd.DatetimeIndex, latest_days: np.ndarray, unit: str, n: int) -> np.ndarray:
+    if unit == 'D':
+        return latest_days - n
+    if unit == 'W':
+        return latest_days - 7 * n
+    if unit == 'M':
+        return _epoch_days(latest_dates - pd.DateOffset(months=n))
+    if unit == 'Y':
+        return _epoch_days(latest_dates - pd.DateOffset(years=n))
+    if unit == 'T':
+        return session_offset(latest_dates, -n).astype('int64')
+    if unit == 'YTD':
+        jan_first = pd.to_datetime(pd.DataFrame({'year': latest_dates.year, 'month': 1, 'day': 1}))
+        return _epoch_days(jan_first) - 1
+    raise ValueError(f"Unsupported calendar unit '{unit}'")
+
+
+def compute_returns(prices: pd.DataFrame, horizons=DEFAULT_HORIZONS, ticker_col: str = 'ticker',
+                    date_col: str = 'market_date', price_col: str = 'close_price',
+                    extra_cols=()) -> pd.DataFrame:
+    """
+    Computes % changes for every ticker and horizon in a single pass.
+
+    The frame is sorted once by (ticker, date); anchors for all tickers of one
+    horizon are then found with a single searchsorted over a combined sort key.
+
+    Args:
+        prices (pd.DataFrame): Long frame with ticker, date and close columns.
+        horizons: Horizon strings (see parse_horizon).
+        extra_cols: Columns to carry over from each ticker's latest row (e.g. 'volume').
+
+    Returns:
+        pd.DataFrame: One row per ticker with [ticker_col, 'as_of_date', 'price', *extra_cols,
+                      change_<horizon>...]. Changes are NaN where history is too short.
+    """
+    parsed = [parse_horizon(h) for h in horizons]
+    columns = [ticker_col, 'as_of_date', 'price'] + list(extra_cols) + [f"change_{key.lower()}" for key, _, _ in parsed]
+
+    data = prices[prices[price_col].notna()]
+    if data.empty:
+        return pd.DataFrame(columns=columns)
+
+    data = data.assign(**{date_col: pd.to_datetime(data[date_col])})
+    data = data.sort_values([ticker_col, date_col], kind='mergesort')
+
+    codes, tickers = pd.factorize(data[ticker_col], sort=True)
+    codes = codes.astype('int64')
+    days = _epoch_days(data[date_col])
+    closes = data[price_col].to_numpy(dtype='float64')
+    keys = codes * KEY_SPAN + days + DAY_OFFSET
+
+    n = len(data)
+    boundaries = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [n]]) - 1
+    group_codes = codes[ends]
+
+    latest_dates = pd.DatetimeIndex(data[date_col].to_numpy()[ends])
+    latest_days = days[ends]
+    latest_closes = closes[ends]
+
+    result = pd.DataFrame({
+        ticker_col: tickers[group_codes],
+        'as_of_date': latest_dates,
+        'price': latest_closes,
+    })
+    for col in extra_cols:
+        result[col] = data[col].to_numpy()[ends]
+
+    for key, unit, count in parsed:
+        target = _target_days(latest_dates, latest_days, unit, count)
+        anchor = np.searchsorted(keys, group_codes * KEY_SPAN + target + DAY_OFFSET, side='right') - 1
+        if unit == 'YTD':
+            # Listed this year: measure from the first close instead
+            anchor = np.maximum(anchor, starts)
+
+        valid = anchor >= starts
+        anchor_closes = np.where(valid, closes[np.clip(anchor, 0, n - 1)], np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = (latest_closes - anchor_closes) / anchor_closes * 100
+        result[f"change_{key.lower()}"] = np.where(np.isfinite(change), change, np.nan)
+
+    return result[columns]
+
+
+def _sql_target(unit: str, n: int) -> str:
+    if unit == 'D':
+        return f"l.date - {n}"
+    if unit == 'W':
+        return f"l.date - {7 * n}"
+    if unit == 'M':
+        return f"(l.date - INTERVAL '{n} months')::date"
+    if unit == 'Y':
+        return f"(l.date - INTERVAL '{n} years')::date"
+    if unit == 'T':
+        # n-th session before the latest date's session, counted over weekdays minus holidays
+        return f"""(
+                    SELECT d::date FROM generate_series(l.date - {_session_span(n)}, l.date, INTERVAL '1 day') d
+                    WHERE extract(isodow FROM d) < 6 AND d::date <> ALL({sql_holiday_array()})
+                    ORDER BY d DESC OFFSET {n} LIMIT 1
+                )"""
+    if unit == 'YTD':
+        return "date_trunc('year', l.date)::date - 1"
+    raise ValueError(f"Unsupported calendar unit '{unit}'")
+
+
+def returns_sql(horizons=DEFAULT_HORIZONS, where: str = "t.industry_id = :iid") -> str:
+    """
+    Builds one Postgres query returning the same columns as compute_returns
+    (ticker, as_of_date, price, volume, change_<horizon>...) for every ticker
+    matching `where` (an expression over tickers `t`).
+
+    Each anchor close is a LATERAL index lookup on (symbol, date), so only one
+    row per ticker leaves the database instead of its whole price history.
+    Semantics match compute_returns, including the YTD first-close fallback.
+    """
+    selects, joins = [], []
+    for i, (key, unit, n) in enumerate(parse_horizon(h) for h in horizons):
+        alias = f"a{i}"
+        lookup = f"AND date <= {_sql_target(unit, n)} ORDER BY date DESC LIMIT 1"
+        joins.append(f"""
+            LEFT JOIN LATERAL (
+                SELECT close FROM us_daily_prices
+                WHERE symbol = t.ticker AND close IS NOT NULL {lookup}
+            ) {alias} ON true""")
+        anchor = f"{alias}.close"
+        if unit == 'YTD':
+            # Listed this year: measure from the first close instead
+            joins.append(f"""
+            LEFT JOIN LATERAL (
+                SELECT close FROM us_daily_prices
+                WHERE symbol = t.ticker AND close IS NOT NULL ORDER BY date ASC LIMIT 1
+            ) {alias}f ON true""")
+            anchor = f"COALESCE({alias}.close, {alias}f.close)"
+        selects.append(f"(l.close - {anchor}) / NULLIF({anchor}, 0) * 100 AS change_{key.lower()}")
+
+    return f"""
+        SELECT t.ticker, l.date AS as_of_date, l.close AS price, l.volume,
+               {', '.join(selects)}
+        FROM tickers t
+        CROSS JOIN LATERAL (
+            SELECT date, close, volume FROM us_daily_prices
+            WHERE symbol = t.ticker AND close IS NOT NULL ORDER BY date DESC LIMIT 1
+        ) l{''.join(joins)}
+        WHERE {where}
+    """
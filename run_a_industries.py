@@ -1,5 +1,5 @@
-import pandas as pd
 from batch_run import BatchController
+from universe_loader import load_universe, sheet_tickers
 from batch_plot import batch_plot
 import os
 
@@ -13,8 +13,8 @@ def main():
     
     # 1. Identify Target Industries
     try:
-        xls = pd.ExcelFile(excel_file)
-        all_sheets = xls.sheet_names
+        # Cached universe: the workbook is parsed once, not again by every controller.run below
+        all_sheets = list(sheet_tickers(load_universe(excel_file)))
         # Filter for industries starting with 'A' (Case sensitive)
         target_industries = [s for s in all_sheets if s.startswith('A')]
         
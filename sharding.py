@@ -0,0 +1,46 @@
+"""
+Deterministic ticker sharding for running ingestion as N parallel processes
+or CI matrix jobs:
+
+    python daily_update.py --shard 1/4   # ... through --shard 4/4
+    python daily_update.py --finalize 4  # verify all shards, then refresh derived tables
+
+A ticker's shard is crc32(symbol) % N, which is stable across processes, hosts
+and Python versions (unlike hash()), so shards never overlap and together cover
+every ticker.
+"""
+import zlib
+
+
+def parse_shard(spec: str) -> tuple:
+    """
+    Parses "i/N" (1-based) into (i, N), e.g. "2/4" -> (2, 4).
+    Raises ValueError for malformed specs.
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid shard '{spec}'. Use i/N, e.g. 1/4")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{spec}': need 1 <= i <= N")
+    return index, count
+
+
+def shard_of(symbol: str, count: int) -> int:
+    """1-based shard that owns `symbol` when the universe is split `count` ways."""
+    return zlib.crc32(symbol.encode('utf-8')) % count + 1
+
+
+def select_shard(symbols, shard: tuple) -> list:
+    """Keeps the symbols owned by shard (i, N); shard=None keeps everything."""
+    if shard is None:
+        return list(symbols)
+    index, count = shard
+    return [s for s in symbols if shard_of(s, count) == index]
+
+
+def shard_job_key(job_key: str, shard: tuple) -> str:
+    """Ledger key for one shard of a job, e.g. '2026-01-05' -> '2026-01-05|shard 2/4'."""
+    if shard is None:
+        return job_key
+    return f"{job_key}|shard {shard[0]}/{shard[1]}"
@@ -0,0 +1,25 @@
+from backfill import year_chunks, job_scope, item_key
+
+def test_year_chunks_cover_range_newest_first():
+    chunks = year_chunks('2010-06-15', '2013-03-01')
+    assert chunks == [
+        (2013, '2013-01-01', '2013-03-01'),
+        (2012, '2012-01-01', '2013-01-01'),
+        (2011, '2011-01-01', '2012-01-01'),
+        (2010, '2010-06-15', '2011-01-01'),
+    ]
+    # End is exclusive: a range ending on Jan 1 adds no empty chunk
+    assert year_chunks('2020-01-01', '2021-01-01') == [(2020, '2020-01-01', '2021-01-01')]
+    assert year_chunks('2021-01-01', '2021-01-01') == []
+
+def test_ledger_keys():
+    assert item_key('BRK.B', 2015) == 'BRK.B@2015'
+    assert job_scope() == 'all'
+    assert job_scope(industry='Airlines') == 'Airlines'
+    # Ticker lists are order-insensitive
+    assert job_scope(['MSFT', 'AAPL']) == job_scope(['AAPL', 'MSFT']) != job_scope(['AAPL'])
+
+if __name__ == "__main__":
+    test_year_chunks_cover_range_newest_first()
+    test_ledger_keys()
+    print("[SUCCESS] Backfill tests passed")
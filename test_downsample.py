@@ -0,0 +1,39 @@
+from downsample import lttb, lttb_batch, lttb_many
+import numpy as np
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(1000)
+    y = np.sin(x / 50.0)
+    y[437] = 5.0  # Spike must survive downsampling
+
+    idx = lttb(x, y, 100)
+    assert len(idx) == 100
+    assert idx[0] == 0 and idx[-1] == 999
+    assert np.all(np.diff(idx) > 0)
+    assert 437 in idx
+
+def test_lttb_short_series_untouched():
+    assert lttb(np.arange(5), np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
+
+def test_batch_matches_single_series():
+    rng = np.random.default_rng(0)
+    ys = np.cumsum(rng.normal(size=(8, 500)), axis=1)
+    x = np.arange(500)
+
+    batched = lttb_batch(x, ys, 120)
+    for row in range(len(ys)):
+        assert batched[row].tolist() == lttb(x, ys[row], 120).tolist()
+
+def test_many_handles_mixed_lengths():
+    rng = np.random.default_rng(1)
+    series = [(np.arange(n), rng.normal(size=n)) for n in (300, 50, 300, 0)]
+    result = lttb_many(series, 100)
+    assert [len(r) for r in result] == [100, 50, 100, 0]
+    assert result[0].tolist() == lttb(*series[0], 100).tolist()
+
+if __name__ == "__main__":
+    test_lttb_keeps_endpoints_and_extremes()
+    test_lttb_short_series_untouched()
+    test_batch_matches_single_series()
+    test_many_handles_mixed_lengths()
+    print("[SUCCESS] Downsampling tests passed")
@@ -0,0 +1,57 @@
+from fetch_scheduler import FetchScheduler, TokenBucket
+import pandas as pd
+import time
+
+def test_token_bucket_enforces_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # First token is free, the other five wait ~1/20s each
+    assert time.monotonic() - start >= 0.2
+
+def test_token_bucket_charges_costs_above_capacity():
+    bucket = TokenBucket(rate=50, capacity=5)
+    bucket.acquire(10)
+    start = time.monotonic()
+    bucket.acquire()
+    # The 5-token debt plus one token is paid back at 50/s
+    assert time.monotonic() - start >= 0.1
+
+def test_run_yields_every_item_with_errors():
+    scheduler = FetchScheduler(workers=4, rate=100)
+
+    def fetch(ticker):
+        if ticker == "BAD":
+            raise RuntimeError("boom")
+        return pd.DataFrame({'close': [1.0]})
+
+    results = {item: (result, error) for item, result, error in scheduler.run(fetch, ["AAPL", "BAD", "MSFT"])}
+    assert set(results) == {"AAPL", "BAD", "MSFT"}
+    assert isinstance(results["BAD"][1], RuntimeError) and results["BAD"][0] is None
+    assert results["AAPL"][1] is None and not results["AAPL"][0].empty
+    assert scheduler.requests == 3 and scheduler.errors == 1
+
+def test_rate_backs_off_on_empty_and_recovers():
+    scheduler = FetchScheduler(workers=1, rate=10, max_rate=10, cooldown=0)
+    list(scheduler.run(lambda t: pd.DataFrame(), ["A", "B"]))
+    assert scheduler.empties == 2
+    assert scheduler.rate == 2.5
+
+    list(scheduler.run(lambda t: {'market_cap': 1}, ["C", "D"]))
+    assert scheduler.rate == 3.5
+
+def test_run_meters_by_cost():
+    scheduler = FetchScheduler(workers=2, rate=100, max_rate=100)
+    batches = [("A", "B", "C"), ("D",)]
+    results = list(scheduler.run(lambda batch: list(batch), batches, cost=len))
+    assert len(results) == 2
+    assert scheduler.requests == 4
+
+if __name__ == "__main__":
+    test_token_bucket_enforces_rate()
+    test_token_bucket_charges_costs_above_capacity()
+    test_run_yields_every_item_with_errors()
+    test_rate_backs_off_on_empty_and_recovers()
+    test_run_meters_by_cost()
+    print("[SUCCESS] Fetch scheduler tests passed")
@@ -0,0 +1,53 @@
+from ingest_pipeline import IngestPipeline
+import pandas as pd
+import time
+
+def frame(symbol, n=3):
+    return pd.DataFrame({'symbol': symbol, 'market_date': pd.bdate_range('2025-01-01', periods=n),
+                         'close': 1.0, 'adj_close': 1.0, 'volume': 1})
+
+def fake_save(batches):
+    def save(df):
+        batches.append(df)
+        return {'inserted': len(df), 'updated': 0, 'unchanged': 0,
+                'changed_symbols': df['symbol'].unique().tolist()}
+    return save
+
+def test_frames_are_coalesced_by_row_threshold():
+    batches = []
+    with IngestPipeline(fake_save(batches), max_rows=6, max_seconds=60) as pipeline:
+        for symbol in ["A", "B", "C", "D", "E"]:
+            pipeline.put(frame(symbol))
+        pipeline.put(pd.DataFrame())  # Empty frames are ignored
+
+    # Two full batches of 6 rows, then the 3-row remainder flushed on close
+    assert [len(b) for b in batches] == [6, 6, 3]
+    assert pipeline.batches == 3
+    assert pipeline.counts['inserted'] == 15
+    assert pipeline.written_symbols == {"A", "B", "C", "D", "E"}
+
+def test_batches_flush_after_max_seconds():
+    batches = []
+    pipeline = IngestPipeline(fake_save(batches), max_rows=1000, max_seconds=0.1).start()
+    pipeline.put(frame("A"))
+    time.sleep(0.3)
+    # Written while the pipeline is still open: the age threshold fired, not close()
+    assert len(batches) == 1
+    pipeline.close()
+    assert len(batches) == 1
+
+def test_failed_writes_are_reported_per_symbol():
+    def save(df):
+        raise RuntimeError("db down")
+
+    with IngestPipeline(save, max_rows=1) as pipeline:
+        pipeline.put(frame("A"))
+        pipeline.put(frame("B"))
+    assert pipeline.failures == {"A": "db down", "B": "db down"}
+    assert pipeline.batches == 0
+
+if __name__ == "__main__":
+    test_frames_are_coalesced_by_row_threshold()
+    test_batches_flush_after_max_seconds()
+    test_failed_writes_are_reported_per_symbol()
+    print("[SUCCESS] Ingest pipeline tests passed")
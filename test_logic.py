@@ -4,7 +4,7 @@ import json
 def test_industry(name):
     print(f"\n--- Testing Industry: {name} ---")
     try:
-        data = get_industry_data(name)
+        data = json.loads(get_industry_data(name).body)
         print(f"Name: {data['industry']}")
         print(f"Ticker Count: {data['ticker_count']}")
         print(f"First Stock: {data['stocks'][0]['symbol'] if data['stocks'] else 'None'}")
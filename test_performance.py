@@ -1,11 +1,12 @@
 import time
 from api import get_industry_data
+import json
 
 def test_timed(name):
     print(f"Testing {name}...")
     start = time.time()
     try:
-        data = get_industry_data(name)
+        data = json.loads(get_industry_data(name).body)
         end = time.time()
         print(f"SUCCESS: {len(data['stocks'])} stocks found in {end-start:.2f} seconds.")
     except Exception as e:
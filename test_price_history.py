@@ -0,0 +1,68 @@
+from price_history import slice_range, slice_ranges, encode_columnar, normalize_range, build_history, build_histories
+import pandas as pd
+import datetime
+
+def make_prices(symbol, start, periods):
+    dates = pd.bdate_range(start=start, periods=periods)
+    return pd.DataFrame({
+        'symbol': symbol,
+        'market_date': dates,
+        'close_price': [100.0 + i for i in range(periods)]
+    })
+
+def test_slice_range_anchors_on_calendar_offset():
+    df = make_prices("AAL", "2025-01-01", 120)
+    sliced = slice_range(df, "1M")
+    latest = df['market_date'].iloc[-1]
+    # First point is the last close on or before (latest - 1 month)
+    assert sliced['market_date'].iloc[0] <= latest - pd.DateOffset(months=1)
+    assert sliced['market_date'].iloc[1] > latest - pd.DateOffset(months=1)
+    assert len(slice_range(df, "1D")) == 2
+    # Not enough history: everything is returned
+    assert len(slice_range(df, "12M")) == len(df)
+
+def test_normalize_range_rejects_unknown():
+    assert normalize_range("ytd") == "YTD"
+    try:
+        normalize_range("7X")
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+
+def test_columnar_round_trip():
+    df = pd.concat([make_prices("AAL", "2025-01-01", 30), make_prices("DAL", "2025-01-15", 10)])
+    encoded = encode_columnar(df, symbols=["AAL", "DAL", "UAL"])
+
+    days = [encoded['base_day']]
+    for d in encoded['day_deltas']:
+        days.append(days[-1] + d)
+    dates = [datetime.date(1970, 1, 1) + datetime.timedelta(days=d) for d in days]
+
+    for symbol in ["AAL", "DAL"]:
+        series = encoded['series'][symbol]
+        expected = df[df['symbol'] == symbol]
+        decoded = [(dates[series['start'] + i], v) for i, v in enumerate(series['values']) if v is not None]
+        assert [d for d, _ in decoded] == [ts.date() for ts in expected['market_date']]
+        assert [v for _, v in decoded] == expected['close_price'].tolist()
+
+    assert encoded['series']['UAL'] == {"start": 0, "values": []}
+
+def test_batched_histories_match_single_symbol():
+    df = pd.concat([make_prices("AAL", "2024-01-01", 400), make_prices("DAL", "2025-03-03", 90),
+                    make_prices("UAL", "2025-06-02", 1)])
+    for range_key in ["1D", "1M", "YTD", "12M", "MAX"]:
+        batched = build_histories(df.sample(frac=1, random_state=0), range_key, 50, symbols=["AAL", "DAL", "UAL", "LUV"])
+        for symbol, group in df.groupby("symbol"):
+            assert batched[symbol] == build_history(group, range_key, 50)
+        assert batched["LUV"] == []
+
+        sliced = slice_ranges(df, range_key)
+        expected = pd.concat([slice_range(g, range_key) for _, g in df.groupby("symbol")])
+        assert sliced.reset_index(drop=True).equals(expected.reset_index(drop=True))
+
+if __name__ == "__main__":
+    test_slice_range_anchors_on_calendar_offset()
+    test_normalize_range_rejects_unknown()
+    test_columnar_round_trip()
+    test_batched_histories_match_single_symbol()
+    print("[SUCCESS] Price history tests passed")
@@ -0,0 +1,46 @@
+from response_cache import PayloadCache
+
+def test_lru_eviction():
+    cache = PayloadCache(max_entries=2)
+    cache.put("a", 1, b"A")
+    cache.put("b", 1, b"B")
+    assert cache.get("a", 1) == b"A"  # 'a' is now most recently used
+    cache.put("c", 1, b"C")
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == b"A" and cache.get("c", 1) == b"C"
+    assert cache.evictions == 1
+
+def test_byte_limit():
+    cache = PayloadCache(max_entries=10, max_bytes=10)
+    cache.put("a", 1, b"x" * 6)
+    cache.put("b", 1, b"y" * 6)
+    assert cache.get("a", 1) is None and cache.get("b", 1) == b"y" * 6
+    assert cache.stats()["bytes"] == 6
+    # Bodies larger than the whole budget are not cached at all
+    cache.put("big", 1, b"z" * 11)
+    assert cache.get("big", 1) is None and cache.get("b", 1) == b"y" * 6
+
+def test_version_rollover():
+    cache = PayloadCache()
+    cache.put("a", "v1", b"A1")
+    assert cache.get("a", "v2") is None
+    cache.put("b", "v2", b"B2")
+    # The first write under a newer version drops every older entry
+    assert cache.get("a", "v1") is None
+    assert cache.stats()["entries"] == 1
+
+def test_older_version_put_is_ignored():
+    cache = PayloadCache()
+    cache.put("a", "v2", b"A2")
+    # A slow build from before the refresh finishes late
+    cache.put("z", "v1", b"Z1")
+    assert cache.get("a", "v2") == b"A2"
+    assert cache.get("z", "v1") is None
+    assert cache.stats()["version"] == "v2"
+
+if __name__ == "__main__":
+    test_lru_eviction()
+    test_byte_limit()
+    test_version_rollover()
+    test_older_version_put_is_ignored()
+    print("[SUCCESS] Response cache tests passed")
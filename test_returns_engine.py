@@ -0,0 +1,74 @@
+from returns_engine import compute_returns, parse_horizons, column_name, _session_span
+from trading_calendar import session_offset
+import pandas as pd
+import numpy as np
+
+def make_prices():
+    dates = pd.bdate_range('2023-11-01', '2024-06-28')
+    frames = []
+    for ticker, scale in (('AAA', 1.0), ('BBB', 2.0)):
+        frames.append(pd.DataFrame({'ticker': ticker, 'market_date': dates,
+                                    'close_price': scale * (100 + np.arange(len(dates)))}))
+    # Newly listed ticker with three sessions
+    frames.append(pd.DataFrame({'ticker': 'NEW', 'market_date': dates[-3:], 'close_price': [10.0, 11.0, 12.0]}))
+    return pd.concat(frames, ignore_index=True).sample(frac=1, random_state=0)
+
+def test_calendar_and_trading_horizons():
+    prices = make_prices()
+    result = compute_returns(prices, ['1D', '1M', '5T', 'YTD']).set_index('ticker')
+
+    aaa = prices[prices['ticker'] == 'AAA'].set_index('market_date')['close_price'].sort_index()
+    latest = aaa.iloc[-1]
+    month_anchor = aaa[aaa.index <= pd.Timestamp('2024-05-28')].iloc[-1]
+    ytd_anchor = aaa[aaa.index <= pd.Timestamp('2023-12-31')].iloc[-1]
+
+    assert np.isclose(result.loc['AAA', 'change_1d'], (latest / aaa.iloc[-2] - 1) * 100)
+    assert np.isclose(result.loc['AAA', 'change_1m'], (latest / month_anchor - 1) * 100)
+    assert np.isclose(result.loc['AAA', 'change_5t'], (latest / aaa.iloc[-6] - 1) * 100)
+    assert np.isclose(result.loc['AAA', 'change_ytd'], (latest / ytd_anchor - 1) * 100)
+    # Scaling prices does not change returns
+    assert np.isclose(result.loc['BBB', 'change_1m'], result.loc['AAA', 'change_1m'])
+
+def test_short_history():
+    result = compute_returns(make_prices(), ['1D', '1M', 'YTD']).set_index('ticker')
+    assert np.isclose(result.loc['NEW', 'change_1d'], (12.0 / 11.0 - 1) * 100)
+    assert np.isnan(result.loc['NEW', 'change_1m'])
+    assert np.isclose(result.loc['NEW', 'change_ytd'], 20.0)
+
+def test_trading_horizons_count_sessions_not_rows():
+    # 2024-07-03 is missing from the feed and 07-04 is a holiday
+    prices = pd.DataFrame({'ticker': 'AAA', 'market_date': pd.to_datetime(['2024-07-01', '2024-07-02', '2024-07-05', '2024-07-08']),
+                           'close_price': [1.0, 2.0, 3.0, 4.0]})
+    result = compute_returns(prices, ['1T', '3T']).iloc[0]
+    assert np.isclose(result['change_1t'], (4.0 / 3.0 - 1) * 100)
+    # Three sessions before 07-08 is 07-02 (07-05, 07-03, 07-02), not the fourth-last row
+    assert np.isclose(result['change_3t'], 100.0)
+
+def test_session_span_reaches_target_session():
+    # The SQL path searches [latest - span, latest] for the n-th session back: 1T on a Monday
+    # and the day after a holiday, and the widest gap anywhere in the calendar, must fit
+    for latest, target in (('2024-07-08', '2024-07-05'), ('2024-07-05', '2024-07-03')):
+        assert session_offset(latest, -1) == pd.Timestamp(target).date()
+        assert pd.Timestamp(latest) - pd.Timedelta(days=_session_span(1)) <= pd.Timestamp(target)
+    days = pd.date_range('2000-01-01', '2030-12-31')
+    for n in (1, 2, 5, 21, 63, 252):
+        gaps = days.values.astype('datetime64[D]') - session_offset(days, -n)
+        assert gaps.astype('int64').max() <= _session_span(n), n
+
+def test_horizon_parsing():
+    assert parse_horizons('1m, 3M,ytd,1M') == ['1M', '3M', 'YTD']
+    assert column_name('12m') == 'change_12m'
+    for bad in ('0D', '3Q', 'M'):
+        try:
+            parse_horizons(bad)
+            assert False, bad
+        except ValueError:
+            pass
+
+if __name__ == "__main__":
+    test_calendar_and_trading_horizons()
+    test_short_history()
+    test_trading_horizons_count_sessions_not_rows()
+    test_session_span_reaches_target_session()
+    test_horizon_parsing()
+    print("[SUCCESS] Returns engine tests passed")
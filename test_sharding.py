@@ -0,0 +1,29 @@
+from sharding import parse_shard, shard_of, select_shard, shard_job_key
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    for bad in ("0/4", "5/4", "1/0", "a/b", "3"):
+        try:
+            parse_shard(bad)
+            assert False, bad
+        except ValueError:
+            pass
+
+def test_shards_partition_the_universe():
+    symbols = [f"T{i}" for i in range(500)] + ["BRK.B", "AAPL"]
+    shards = [select_shard(symbols, (i, 4)) for i in range(1, 5)]
+    assert sorted(s for shard in shards for s in shard) == sorted(symbols)
+    assert all(shards)
+    # Stable across processes: crc32, not the salted built-in hash()
+    assert shard_of("AAPL", 4) == 3060094812 % 4 + 1
+    assert select_shard(symbols, None) == symbols
+
+def test_shard_job_key():
+    assert shard_job_key("2026-01-05", None) == "2026-01-05"
+    assert shard_job_key("2026-01-05", (2, 4)) == "2026-01-05|shard 2/4"
+
+if __name__ == "__main__":
+    test_parse_shard()
+    test_shards_partition_the_universe()
+    test_shard_job_key()
+    print("[SUCCESS] Sharding tests passed")
@@ -0,0 +1,49 @@
+from singleflight import SingleFlight
+import threading
+import time
+
+def run_concurrently(n, target):
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls, results = [], []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.2)
+        return "payload"
+
+    run_concurrently(10, lambda: results.append(flight.do("industry", build)))
+    assert len(calls) == 1
+    assert results == ["payload"] * 10
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 9}
+
+    # Completed calls are not cached: the next call runs again
+    assert flight.do("industry", build) == "payload" and len(calls) == 2
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    errors = []
+
+    def fail():
+        time.sleep(0.2)
+        raise ValueError("db down")
+
+    def call():
+        try:
+            flight.do("industry", fail)
+        except ValueError:
+            errors.append(1)
+
+    run_concurrently(5, call)
+    assert len(errors) == 5
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_execution()
+    test_errors_reach_every_waiter()
+    print("[SUCCESS] Single-flight tests passed")
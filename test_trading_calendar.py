@@ -0,0 +1,30 @@
+from trading_calendar import is_trading_day, previous_session, next_session, sessions_between, session_offset
+import datetime
+import pandas as pd
+
+def test_holidays_and_weekends():
+    assert not is_trading_day('2024-07-04')           # Independence Day
+    assert not is_trading_day('2024-03-29')           # Good Friday
+    assert not is_trading_day('2022-06-20')           # Juneteenth observed on Monday
+    assert not is_trading_day('2024-07-06')           # Saturday
+    assert is_trading_day('2021-12-31')               # New Year on Saturday is not observed
+    assert is_trading_day('2024-11-29')               # Early close is still a session
+    assert len(sessions_between('2023-01-01', '2023-12-31')) == 250
+
+def test_session_navigation():
+    assert previous_session('2024-07-05') == datetime.date(2024, 7, 3)
+    assert previous_session('2024-07-08') == datetime.date(2024, 7, 5)
+    assert next_session('2024-07-03') == datetime.date(2024, 7, 5)
+    assert list(sessions_between('2024-12-23', '2024-12-27').strftime('%m-%d')) == ['12-23', '12-24', '12-26', '12-27']
+
+    # Non-sessions roll back before moving
+    assert session_offset('2024-07-06', 0) == datetime.date(2024, 7, 5)
+    assert session_offset('2024-07-05', -1) == datetime.date(2024, 7, 3)
+    assert session_offset('2024-07-03', 1) == datetime.date(2024, 7, 5)
+    shifted = session_offset(pd.DatetimeIndex(['2024-07-05', '2024-07-08']), -2)
+    assert [str(d) for d in shifted] == ['2024-07-02', '2024-07-03']
+
+if __name__ == "__main__":
+    test_holidays_and_weekends()
+    test_session_navigation()
+    print("[SUCCESS] Trading calendar tests passed")
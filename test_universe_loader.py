@@ -0,0 +1,55 @@
+import os
+import tempfile
+import pandas as pd
+import universe_loader
+from universe_loader import load_universe, resolve_industry_name, sheet_tickers
+
+SHEETS = {
+    'Aerospace & Defense': pd.DataFrame({'Ticker': ['BA', ' LMT', 'BA', None], 'Industry': ['Aerospace & Defense Manufacturing', None, None, None]}),
+    'Airlines': pd.DataFrame({'Ticker': ['DAL', 'UAL'], 'Industry': ['Air', 'Air']}),
+    'Notes': pd.DataFrame({'Comment': ['no tickers here']}),
+}
+
+def test_resolve_industry_name():
+    assert resolve_industry_name('Aerospace & Defense', SHEETS['Aerospace & Defense']) == 'Aerospace & Defense Manufacturing'
+    # Too short to be a real name
+    assert resolve_industry_name('Airlines', SHEETS['Airlines']) == 'Airlines'
+    assert resolve_industry_name('Notes', SHEETS['Notes']) == 'Notes'
+
+def test_cached_universe():
+    calls = []
+    def fake_read_excel(path, sheet_name=None):
+        calls.append(path)
+        return SHEETS
+
+    original_read, original_dir = universe_loader.pd.read_excel, universe_loader.CACHE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        universe_loader.pd.read_excel = fake_read_excel
+        universe_loader.CACHE_DIR = os.path.join(tmp, 'cache')
+        try:
+            workbook = os.path.join(tmp, 'universe.xlsx')
+            with open(workbook, 'wb') as f:
+                f.write(b'v1')
+
+            first = load_universe(workbook)
+            second = load_universe(workbook)
+            assert len(calls) == 1
+            pd.testing.assert_frame_equal(first, second)
+
+            by_sheet = sheet_tickers(second)
+            assert list(by_sheet) == ['Aerospace & Defense', 'Airlines']
+            assert by_sheet['Aerospace & Defense'] == ('Aerospace & Defense Manufacturing', ['BA', 'LMT'])
+
+            # A changed workbook is parsed again
+            with open(workbook, 'wb') as f:
+                f.write(b'v2 changed')
+            load_universe(workbook)
+            assert len(calls) == 2
+        finally:
+            universe_loader.pd.read_excel = original_read
+            universe_loader.CACHE_DIR = original_dir
+
+if __name__ == "__main__":
+    test_resolve_industry_name()
+    test_cached_universe()
+    print("[SUCCESS] Universe loader tests passed")
@@ -0,0 +1,105 @@
+"""
+Offline NYSE trading calendar.
+
+The holiday table below was generated once from the exchange rules (New Year,
+MLK, Presidents Day, Good Friday, Memorial Day, Juneteenth from 2022,
+Independence Day, Labor Day, Thanksgiving, Christmas with weekend observance)
+plus unscheduled closures (9/11, Hurricane Sandy, national days of mourning).
+Outside COVERAGE only weekends are excluded. Extend the table when new years
+or closures are announced.
+
+Every function accepts anything pd.Timestamp understands; session_offset also
+takes arrays for vectorized use.
+"""
+import datetime
+import numpy as np
+import pandas as pd
+
+COVERAGE = (datetime.date(2000, 1, 1), datetime.date(2030, 12, 31))
+
+# Full-day closures by year (early closes are sessions and are not listed)
+HOLIDAYS = {
+    2000: ('01-17', '02-21', '04-21', '05-29', '07-04', '09-04', '11-23', '12-25'),
+    2001: ('01-01', '01-15', '02-19', '04-13', '05-28', '07-04', '09-03', '09-11', '09-12', '09-13', '09-14', '11-22', '12-25'),
+    2002: ('01-01', '01-21', '02-18', '03-29', '05-27', '07-04', '09-02', '11-28', '12-25'),
+    2003: ('01-01', '01-20', '02-17', '04-18', '05-26', '07-04', '09-01', '11-27', '12-25'),
+    2004: ('01-01', '01-19', '02-16', '04-09', '05-31', '06-11', '07-05', '09-06', '11-25', '12-24'),
+    2005: ('01-17', '02-21', '03-25', '05-30', '07-04', '09-05', '11-24', '12-26'),
+    2006: ('01-02', '01-16', '02-20', '04-14', '05-29', '07-04', '09-04', '11-23', '12-25'),
+    2007: ('01-01', '01-02', '01-15', '02-19', '04-06', '05-28', '07-04', '09-03', '11-22', '12-25'),
+    2008: ('01-01', '01-21', '02-18', '03-21', '05-26', '07-04', '09-01', '11-27', '12-25'),
+    2009: ('01-01', '01-19', '02-16', '04-10', '05-25', '07-03', '09-07', '11-26', '12-25'),
+    2010: ('01-01', '01-18', '02-15', '04-02', '05-31', '07-05', '09-06', '11-25', '12-24'),
+    2011: ('01-17', '02-21', '04-22', '05-30', '07-04', '09-05', '11-24', '12-26'),
+    2012: ('01-02', '01-16', '02-20', '04-06', '05-28', '07-04', '09-03', '10-29', '10-30', '11-22', '12-25'),
+    2013: ('01-01', '01-21', '02-18', '03-29', '05-27', '07-04', '09-02', '11-28', '12-25'),
+    2014: ('01-01', '01-20', '02-17', '04-18', '05-26', '07-04', '09-01', '11-27', '12-25'),
+    2015: ('01-01', '01-19', '02-16', '04-03', '05-25', '07-03', '09-07', '11-26', '12-25'),
+    2016: ('01-01', '01-18', '02-15', '03-25', '05-30', '07-04', '09-05', '11-24', '12-26'),
+    2017: ('01-02', '01-16', '02-20', '04-14', '05-29', '07-04', '09-04', '11-23', '12-25'),
+    2018: ('01-01', '01-15', '02-19', '03-30', '05-28', '07-04', '09-03', '11-22', '12-05', '12-25'),
+    2019: ('01-01', '01-21', '02-18', '04-19', '05-27', '07-04', '09-02', '11-28', '12-25'),
+    2020: ('01-01', '01-20', '02-17', '04-10', '05-25', '07-03', '09-07', '11-26', '12-25'),
+    2021: ('01-01', '01-18', '02-15', '04-02', '05-31', '07-05', '09-06', '11-25', '12-24'),
+    2022: ('01-17', '02-21', '04-15', '05-30', '06-20', '07-04', '09-05', '11-24', '12-26'),
+    2023: ('01-02', '01-16', '02-20', '04-07', '05-29', '06-19', '07-04', '09-04', '11-23', '12-25'),
+    2024: ('01-01', '01-15', '02-19', '03-29', '05-27', '06-19', '07-04', '09-02', '11-28', '12-25'),
+    2025: ('01-01', '01-09', '01-20', '02-17', '04-18', '05-26', '06-19', '07-04', '09-01', '11-27', '12-25'),
+    2026: ('01-01', '01-19', '02-16', '04-03', '05-25', '06-19', '07-03', '09-07', '11-26', '12-25'),
+    2027: ('01-01', '01-18', '02-15', '03-26', '05-31', '06-18', '07-05', '09-06', '11-25', '12-24'),
+    2028: ('01-17', '02-21', '04-14', '05-29', '06-19', '07-04', '09-04', '11-23', '12-25'),
+    2029: ('01-01', '01-15', '02-19', '03-30', '05-28', '06-19', '07-04', '09-03', '11-22', '12-25'),
+    2030: ('01-01', '01-21', '02-18', '04-19', '05-27', '06-19', '07-04', '09-02', '11-28', '12-25'),
+}
+
+HOLIDAY_DATES = np.array([f"{year}-{day}" for year, days in HOLIDAYS.items() for day in days], dtype='datetime64[D]')
+CALENDAR = np.busdaycalendar(weekmask='1111100', holidays=HOLIDAY_DATES)
+
+
+def _to_day(day) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(day).date(), 'D')
+
+
+def is_trading_day(day) -> bool:
+    """True when the exchange holds a regular (full or early-close) session on this date."""
+    return bool(np.is_busday(_to_day(day), busdaycal=CALENDAR))
+
+
+def previous_session(day) -> datetime.date:
+    """Latest session strictly before `day` (e.g. the last completed session as of today)."""
+    return np.busday_offset(_to_day(day) - 1, 0, roll='backward', busdaycal=CALENDAR).astype(object)
+
+
+def next_session(day) -> datetime.date:
+    """Earliest session strictly after `day`."""
+    return np.busday_offset(_to_day(day) + 1, 0, roll='forward', busdaycal=CALENDAR).astype(object)
+
+
+def sessions_between(start, end) -> pd.DatetimeIndex:
+    """All sessions from start to end, both inclusive."""
+    days = np.arange(_to_day(start), _to_day(end) + 1, dtype='datetime64[D]')
+    return pd.DatetimeIndex(days[np.is_busday(days, busdaycal=CALENDAR)].astype('datetime64[ns]'))
+
+
+def session_offset(day, n: int):
+    """
+    Moves n sessions from `day` (negative = earlier). A non-session `day` is first
+    rolled back to the session before it, so session_offset(d, 0) is the latest
+    session on or before d.
+
+    Args:
+        day: A date, or an array / DatetimeIndex of dates.
+        n (int): Sessions to move.
+
+    Returns:
+        datetime.date for a scalar input, else a datetime64[D] array.
+    """
+    if np.ndim(day) == 0 and not isinstance(day, (pd.Index, np.ndarray)):
+        return np.busday_offset(_to_day(day), n, roll='backward', busdaycal=CALENDAR).astype(object)
+    days = pd.DatetimeIndex(day).values.astype('datetime64[D]')
+    return np.busday_offset(days, n, roll='backward', busdaycal=CALENDAR)
+
+
+def sql_holiday_array() -> str:
+    """HOLIDAY_DATES as a Postgres date[] literal, for queries that count sessions in SQL."""
+    return "'{" + ",".join(str(d) for d in HOLIDAY_DATES) + "}'::date[]"
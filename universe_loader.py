@@ -0,0 +1,126 @@
+"""
+Loads the stock universe (industry -> tickers) from US_Stocks_Classified.xlsx.
+
+The workbook is parsed in a single read_excel(sheet_name=None) pass and the
+normalized table is cached under .cache/ keyed by the workbook's content hash,
+so later runs skip openpyxl entirely. The hash itself is only recomputed when
+the file's mtime or size changes.
+"""
+import hashlib
+import json
+import os
+import pandas as pd
+
+DEFAULT_WORKBOOK = "US_Stocks_Classified.xlsx"
+CACHE_DIR = os.getenv("UNIVERSE_CACHE_DIR", ".cache")
+# Bump when the normalization below changes so old caches are ignored
+CACHE_VERSION = 1
+
+# pyarrow is optional: Parquet is the cache format when available, pickle otherwise
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = "parquet"
+except ImportError:
+    CACHE_FORMAT = "pkl"
+
+COLUMNS = ['sheet', 'industry', 'ticker']
+
+
+def resolve_industry_name(sheet_name: str, df: pd.DataFrame) -> str:
+    """
+    Real industry name for a sheet: the first 'Industry' value in the sheet's first
+    rows when it looks like a name (sheet names are truncated to 31 chars by Excel).
+    """
+    if 'Industry' in df.columns:
+        candidates = df['Industry'].head(5).dropna()
+        if not candidates.empty:
+            candidate_name = candidates.iloc[0]
+            if isinstance(candidate_name, str) and len(candidate_name) > 3:
+                return candidate_name.strip()
+    return sheet_name
+
+
+def parse_workbook(path: str) -> pd.DataFrame:
+    """
+    Reads every sheet in one pass.
+
+    Returns:
+        pd.DataFrame: [sheet, industry, ticker] in workbook order, one row per unique
+                      ticker per sheet. Sheets without a 'Ticker' column are skipped.
+    """
+    sheets = pd.read_excel(path, sheet_name=None)
+    frames = []
+    for sheet_name, df in sheets.items():
+        if 'Ticker' not in df.columns:
+            print(f"[Universe] Warning: Sheet '{sheet_name}' missing 'Ticker' column (Skipping).")
+            continue
+        tickers = df['Ticker'].dropna().astype(str).str.strip()
+        tickers = tickers[tickers != ''].unique()
+        frames.append(pd.DataFrame({
+            'sheet': sheet_name,
+            'industry': resolve_industry_name(sheet_name, df),
+            'ticker': tickers,
+        }))
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(frames, ignore_index=True)[COLUMNS]
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _workbook_hash(path: str) -> str:
+    """Content hash, reusing the last one recorded for this path while mtime and size are unchanged."""
+    stat = os.stat(path)
+    meta_path = os.path.join(CACHE_DIR, f"universe_{os.path.basename(path)}.json")
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+            return meta['sha256']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    sha256 = _file_hash(path)
+    with open(meta_path, 'w') as f:
+        json.dump({'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': sha256}, f)
+    return sha256
+
+
+def load_universe(path: str = DEFAULT_WORKBOOK, use_cache: bool = True) -> pd.DataFrame:
+    """
+    Returns the normalized universe table (see parse_workbook), from cache when the
+    workbook is unchanged.
+    """
+    if not use_cache:
+        return parse_workbook(path)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cache_path = os.path.join(CACHE_DIR, f"universe_v{CACHE_VERSION}_{_workbook_hash(path)[:16]}.{CACHE_FORMAT}")
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_parquet(cache_path) if CACHE_FORMAT == "parquet" else pd.read_pickle(cache_path)
+        except Exception as e:
+            print(f"[Universe] Ignoring unreadable cache {cache_path}: {e}")
+
+    print(f"[Universe] Parsing {path} (cache miss)...")
+    universe = parse_workbook(path)
+    try:
+        if CACHE_FORMAT == "parquet":
+            universe.to_parquet(cache_path, index=False)
+        else:
+            universe.to_pickle(cache_path)
+    except Exception as e:
+        print(f"[Universe] Could not write cache {cache_path}: {e}")
+    return universe
+
+
+def sheet_tickers(universe: pd.DataFrame) -> dict:
+    """{sheet: (industry name, [tickers])} in workbook order."""
+    return {sheet: (group['industry'].iloc[0], group['ticker'].tolist())
+            for sheet, group in universe.groupby('sheet', sort=False)}
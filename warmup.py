@@ -0,0 +1,100 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CacheWarmer:
+    """
+    Preloads API payloads in a background thread with bounded concurrency and
+    tracks progress for the readiness probe.
+
+    Args:
+        list_keys (callable): Returns the keys to warm, hottest first (e.g. industry names).
+        warm_one (callable): Builds and caches the payload(s) for one key. Returning False
+                             marks the key as skipped (e.g. the cache is full).
+        concurrency (int): Parallel builds. Keep below the DB connection pool size.
+    """
+
+    def __init__(self, list_keys, warm_one, concurrency: int = 4):
+        self.list_keys = list_keys
+        self.warm_one = warm_one
+        self.concurrency = max(1, concurrency)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.state = "pending"
+        self.total = 0
+        self.done = 0
+        self.failed = []
+        self.skipped = 0
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self):
+        """Starts warming in a daemon thread; returns immediately."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run, name="cache-warmup", daemon=True)
+        self._thread.start()
+
+    def run(self):
+        with self._lock:
+            self.state = "warming"
+            self.started_at = time.time()
+        try:
+            keys = list(self.list_keys())
+        except Exception as e:
+            print(f"[WARMUP] Could not list keys: {e}")
+            keys = []
+            self.error = str(e)
+
+        with self._lock:
+            self.total = len(keys)
+        print(f"[WARMUP] Warming {len(keys)} payloads (concurrency {self.concurrency})...")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="warmup") as pool:
+            for key, (warmed, error) in zip(keys, pool.map(self._warm, keys)):
+                with self._lock:
+                    self.done += 1
+                    if error is not None:
+                        self.failed.append((key, error))
+                    elif not warmed:
+                        self.skipped += 1
+
+        with self._lock:
+            self.state = "ready"
+            self.finished_at = time.time()
+        print(f"[WARMUP] Done: {self.total - len(self.failed) - self.skipped}/{self.total} warm "
+              f"({self.skipped} skipped, cache full) in {self.finished_at - self.started_at:.1f}s.")
+
+    def _warm(self, key):
+        try:
+            return self.warm_one(key) is not False, None
+        except Exception as e:
+            print(f"[WARMUP] Failed to warm {key}: {e}")
+            return False, str(e)
+
+    @property
+    def ready(self) -> bool:
+        # Failures do not block readiness: those keys are simply built on first request
+        return self.state in ("ready", "disabled")
+
+    def disable(self):
+        with self._lock:
+            self.state = "disabled"
+
+    def progress(self) -> dict:
+        with self._lock:
+            elapsed = None
+            if self.started_at is not None:
+                elapsed = round((self.finished_at or time.time()) - self.started_at, 1)
+            return {
+                "state": self.state,
+                "warmed": self.done - len(self.failed) - self.skipped,
+                "failed": len(self.failed),
+                "skipped": self.skipped,
+                "total": self.total,
+                "elapsed_seconds": elapsed,
+                "error": self.error,
+            }